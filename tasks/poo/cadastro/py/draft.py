@@ -1,10 +1,29 @@
 
 from __future__ import annotations
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from array import array
+from contextlib import contextmanager
+import asyncio
+from bisect import bisect_left, bisect_right, insort
+from decimal import Decimal
+from itertools import islice
+from multiprocessing.connection import Connection
+from typing import Dict, Iterable, Iterator, List, TextIO, Tuple
+import math
+import mmap
+import multiprocessing
+import random
+import struct
+import sys
+import threading
+import time
 
 
 
+# registro de transação em lote: (op, conta origem, conta destino, valor)
+Transaction = Tuple[str, int, int, float]
+
+
 class Account(ABC):
     def __init__(self, accId: int, clientId: str, typeId: str):
         self._accId = accId
@@ -99,6 +118,12 @@ class Client:
         accs = " ".join(str(a) for a in self._accounts) if self._accounts else "-"
         return f"{self._clientId}:{self._name} [{accs}]"
 
+    def writeTo(self, out: TextIO, pageSize: int = 1000) -> None:
+        """Escreve o mesmo texto de __str__ em out, com as contas em páginas de pageSize."""
+        out.write(f"{self._clientId}:{self._name} [")
+        _writePaged(out, (str(a) for a in self._accounts), " ", pageSize)
+        out.write("]")
+
 
 
 class Agency:
@@ -106,6 +131,12 @@ class Agency:
         self.accounts: Dict[int, Account] = {}  
         self.clients: Dict[str, Client] = {}    
         self.nextAccountId: int = 1
+        # índices secundários
+        self._byClient: Dict[str, List[int]] = {}
+        self._byType: Dict[str, List[int]] = {}
+        self._balanceIndex: List[tuple[float, int]] = []  # (saldo, accId) ordenado
+        self._indexedBalance: Dict[int, float] = {}       # saldo de cada conta no índice
+        self._dirty: set[int] = set()                     # contas com saldo possivelmente mudado
 
     def getAccount(self, accountId: int) -> Account | None:
         return self.accounts.get(accountId)
@@ -118,9 +149,9 @@ class Agency:
         self.clients[clientId] = client
 
         
-        cc = CheckingAccount(self.nextAccountId, clientId)
+        cc = self._newCheckingAccount(self.nextAccountId, clientId)
         self.nextAccountId += 1
-        pp = SavingsAccount(self.nextAccountId, clientId)
+        pp = self._newSavingsAccount(self.nextAccountId, clientId)
         self.nextAccountId += 1
 
         
@@ -128,31 +159,177 @@ class Agency:
         self.accounts[pp.getId()] = pp
         client.addAccount(cc)
         client.addAccount(pp)
+        for acc in (cc, pp):
+            self._byClient.setdefault(clientId, []).append(acc.getId())
+            self._byType.setdefault(acc.getTypeId(), []).append(acc.getId())
+            self._dirty.add(acc.getId())
+
+    def _newCheckingAccount(self, accId: int, clientId: str) -> Account:
+        return CheckingAccount(accId, clientId)
+
+    def _newSavingsAccount(self, accId: int, clientId: str) -> Account:
+        return SavingsAccount(accId, clientId)
 
    
     def deposit(self, accId: int, value: float) -> None:
         acc = self.getAccount(accId)
         if acc is None:
             raise ValueError("fail: conta inexistente")
-        acc.deposit(value)
+        try:
+            acc.deposit(value)
+        finally:
+            self._dirty.add(accId)  # depois de mexer no saldo, nunca antes
 
     def withdraw(self, accId: int, value: float) -> None:
         acc = self.getAccount(accId)
         if acc is None:
             raise ValueError("fail: conta inexistente")
-        acc.withdraw(value)
+        try:
+            acc.withdraw(value)
+        finally:
+            self._dirty.add(accId)
 
     def transfer(self, fromAccId: int, toAccId: int, value: float) -> None:
         src = self.getAccount(fromAccId)
         dst = self.getAccount(toAccId)
         if src is None or dst is None:
             raise ValueError("fail: conta inexistente")
-        src.transfer(dst, value)
+        try:
+            src.transfer(dst, value)
+        finally:
+            self._dirty.add(fromAccId)
+            self._dirty.add(toAccId)
 
     def updateMonthly(self) -> None:
         
         for acc in self.accounts.values():
             acc.updateMonthly()
+        self._dirty.update(self.accounts)
+
+    # --- consultas pelos índices secundários ---
+    def _refreshBalanceIndex(self) -> None:
+        """Reposiciona no índice ordenado só as contas marcadas como alteradas."""
+        if not self._dirty:
+            return
+        # reordenar tudo custa ~n log n; reposicionar custa ~log n por conta
+        n = len(self.accounts)
+        if len(self._dirty) * math.log2(n + 1) > n:
+            self._balanceIndex = sorted((a.getBalance(), i) for i, a in self.accounts.items())
+            self._indexedBalance = {i: b for b, i in self._balanceIndex}
+        else:
+            index = self._balanceIndex
+            for accId in self._dirty:
+                new = self.accounts[accId].getBalance()
+                old = self._indexedBalance.get(accId)
+                if old == new:
+                    continue
+                if old is not None:
+                    del index[bisect_left(index, (old, accId))]
+                insort(index, (new, accId))
+                self._indexedBalance[accId] = new
+        self._dirty.clear()
+
+    def accountsOfClient(self, clientId: str) -> List[Account]:
+        return [self.accounts[i] for i in self._byClient.get(clientId, [])]
+
+    def accountsOfType(self, typeId: str) -> List[Account]:
+        return [self.accounts[i] for i in self._byType.get(typeId, [])]
+
+    def accountsByBalance(self, minBalance: float = float("-inf"), maxBalance: float = float("inf"),
+                          clientId: str | None = None, typeId: str | None = None) -> List[Account]:
+        """
+        Contas com minBalance <= saldo <= maxBalance, em ordem crescente de saldo,
+        opcionalmente filtradas por cliente e/ou tipo.
+        Só enxerga mudanças feitas pelos métodos da Agency.
+        """
+        self._refreshBalanceIndex()
+        if clientId is not None:
+            # poucas contas por cliente: mais barato filtrar a lista dele
+            ids = self._byClient.get(clientId, [])
+            found = sorted((self._indexedBalance[i], i) for i in ids
+                           if minBalance <= self._indexedBalance[i] <= maxBalance)
+        else:
+            index = self._balanceIndex
+            lo = bisect_left(index, (minBalance, -1))
+            hi = bisect_right(index, (maxBalance, self.nextAccountId))
+            found = index[lo:hi]
+        accs = [self.accounts[i] for _, i in found]
+        if typeId is not None:
+            accs = [a for a in accs if a.getTypeId() == typeId]
+        return accs
+
+    def _validateRecord(self, record: Transaction) -> tuple[Account, Account | None, float]:
+        if isinstance(record, Exception):
+            raise record  # linha que o leitor não conseguiu interpretar
+        op, fromId, toId, value = record
+        if op not in ("deposit", "withdraw", "transfer"):
+            raise ValueError(f"fail: operação inválida {op}")
+        src = self.accounts.get(fromId)
+        dst = self.accounts.get(toId) if op == "transfer" else None
+        if src is None or (op == "transfer" and dst is None):
+            raise ValueError("fail: conta inexistente")
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError("fail: valor inválido")
+        if value <= 0:
+            raise ValueError("fail: valor deve ser positivo")
+        return src, dst, value
+
+    def applyBatch(self, records: Iterable[Transaction | ValueError],
+                   chunkSize: int = 10_000) -> List[tuple[int, str]]:
+        """
+        Aplica registros (op, from, to, value) em lotes de chunkSize, tudo ou nada
+        por lote. op é deposit, withdraw ou transfer ("to" só vale para transfer).
+        Cada lote é validado antes (operação, contas, valor finito e positivo);
+        se algum registro falhar, inclusive por saldo insuficiente, os saldos do
+        lote são restaurados. Um ValueError no lugar de um registro (linha ruim
+        vinda de readTransactionsCsv) conta como registro com falha.
+        Retorna (índice, mensagem) para todo registro que não foi aplicado: os
+        que falharam com o motivo, e os demais do lote com LOTE_DESCARTADO.
+        """
+        errors: List[tuple[int, str]] = []
+        chunk: List[tuple[int, Transaction | ValueError]] = []
+        for index, record in enumerate(records):
+            chunk.append((index, record))
+            if len(chunk) >= chunkSize:
+                errors += self._applyChunk(chunk)
+                chunk = []
+        if chunk:
+            errors += self._applyChunk(chunk)
+        return errors
+
+    def _applyChunk(self, chunk: List[tuple[int, Transaction | ValueError]]) -> List[tuple[int, str]]:
+        errors: List[tuple[int, str]] = []
+        resolved: List[tuple[int, str, Account, Account | None, float]] = []
+        for index, record in chunk:
+            try:
+                src, dst, value = self._validateRecord(record)
+            except (ValueError, TypeError) as e:
+                errors.append((index, str(e)))
+                continue
+            resolved.append((index, record[0], src, dst, value))  # type: ignore[index]
+        if errors:
+            return _rejectChunk(chunk, errors)
+        saved: Dict[int, tuple[Account, float]] = {}
+        for index, op, src, dst, value in resolved:
+            if src.getId() not in saved:
+                saved[src.getId()] = (src, src._balance)
+            if dst is not None and dst.getId() not in saved:
+                saved[dst.getId()] = (dst, dst._balance)
+            try:
+                if op == "deposit":
+                    src.deposit(value)
+                elif op == "withdraw":
+                    src.withdraw(value)
+                else:
+                    src.transfer(dst, value)
+            except ValueError as e:
+                errors.append((index, str(e)))
+        self._dirty.update(saved)
+        if errors:
+            for acc, balance in saved.values():
+                acc._balance = balance
+            return _rejectChunk(chunk, errors)
+        return errors
 
     def __str__(self) -> str:
         
@@ -160,3 +337,1036 @@ class Agency:
         
         accs = " ".join(str(a) for a in self.accounts.values()) or "-"
         return f"Clientes: {cls}\nContas: {accs}"
+
+    # --- relatório em streaming ---
+    def iterClientsText(self, offset: int = 0, limit: int | None = None) -> Iterator[str]:
+        stop = None if limit is None else offset + limit
+        return (str(c) for c in islice(self.clients.values(), offset, stop))
+
+    def iterAccountsText(self, offset: int = 0, limit: int | None = None) -> Iterator[str]:
+        stop = None if limit is None else offset + limit
+        return (str(a) for a in islice(self.accounts.values(), offset, stop))
+
+    def writeReport(self, out: TextIO, clientOffset: int = 0, clientLimit: int | None = None,
+                    accountOffset: int = 0, accountLimit: int | None = None,
+                    pageSize: int = 1000) -> None:
+        """
+        Escreve o mesmo texto de __str__ em out, página a página (pageSize
+        entradas por write), sem montar o relatório inteiro na memória.
+        clientOffset/clientLimit recortam a lista de clientes e
+        accountOffset/accountLimit a de contas, cada uma independente da outra.
+        """
+        out.write("Clientes: ")
+        stop = None if clientLimit is None else clientOffset + clientLimit
+        empty = True
+        for client in islice(self.clients.values(), clientOffset, stop):
+            if not empty:
+                out.write(" | ")
+            client.writeTo(out, pageSize)
+            empty = False
+        if empty:
+            out.write("-")
+        out.write("\nContas: ")
+        _writePaged(out, self.iterAccountsText(accountOffset, accountLimit), " ", pageSize)
+
+
+LOTE_DESCARTADO = "fail: lote descartado"
+
+
+def _rejectChunk(chunk: List[tuple[int, Transaction | ValueError]],
+                 errors: List[tuple[int, str]]) -> List[tuple[int, str]]:
+    """Falhas do lote mais LOTE_DESCARTADO para os outros registros dele, em ordem."""
+    failed = dict(errors)
+    return [(index, failed.get(index, LOTE_DESCARTADO)) for index, _ in chunk]
+
+
+def _writePaged(out: TextIO, parts: Iterator[str], sep: str, pageSize: int) -> None:
+    """Escreve parts separados por sep, em blocos de pageSize; "-" se vazio."""
+    first = True
+    while True:
+        page = list(islice(parts, pageSize))
+        if not page:
+            break
+        out.write(sep.join(page) if first else sep + sep.join(page))
+        first = False
+    if first:
+        out.write("-")
+
+
+
+def readTransactionsCsv(stream: TextIO) -> Iterator[Transaction | ValueError]:
+    """
+    Lê linhas "op,from,to,value" (to vazio quando não se aplica) para Agency.applyBatch.
+    Uma linha mal formada vira um ValueError no lugar do registro, para que o
+    applyBatch a reporte pelo índice em vez de interromper a leitura.
+    """
+    for lineNo, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            op, fromId, toId, value = line.split(",")
+            yield (op.strip(), int(fromId), int(toId) if toId.strip() else 0, float(value))
+        except ValueError:
+            yield ValueError(f"fail: linha {lineNo} inválida: {line}")
+
+
+
+class ConcurrentAgency(Agency):
+    """
+    Agency que pode ser usada por várias threads ao mesmo tempo.
+    As contas são protegidas por um conjunto fixo de locks (lock striping):
+    a conta N usa o lock N % stripes. A transferência pega os dois locks
+    sempre em ordem crescente de índice, o que evita deadlock.
+    """
+
+    def __init__(self, stripes: int = 64):
+        super().__init__()
+        if stripes <= 0:
+            raise ValueError("fail: número de locks deve ser positivo")
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+        self._clientsLock = threading.Lock()
+
+    def _lockOf(self, accId: int) -> threading.Lock:
+        return self._locks[accId % len(self._locks)]
+
+    def addClient(self, clientId: str, name: str) -> None:
+        with self._clientsLock:
+            super().addClient(clientId, name)
+
+    def deposit(self, accId: int, value: float) -> None:
+        with self._lockOf(accId):
+            super().deposit(accId, value)
+
+    def withdraw(self, accId: int, value: float) -> None:
+        with self._lockOf(accId):
+            super().withdraw(accId, value)
+
+    def transfer(self, fromAccId: int, toAccId: int, value: float) -> None:
+        a = fromAccId % len(self._locks)
+        b = toAccId % len(self._locks)
+        if a == b:
+            with self._locks[a]:
+                super().transfer(fromAccId, toAccId, value)
+            return
+        first, second = (a, b) if a < b else (b, a)
+        with self._locks[first], self._locks[second]:
+            super().transfer(fromAccId, toAccId, value)
+
+    @contextmanager
+    def _allLocks(self) -> Iterator[None]:
+        # todos os stripes, sempre na mesma ordem crescente
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def updateMonthly(self) -> None:
+        # _clientsLock primeiro, na mesma ordem de accountsByBalance: addClient não mexe em accounts no meio
+        with self._clientsLock, self._allLocks():
+            super().updateMonthly()
+
+    def _applyChunk(self, chunk: List[tuple[int, Transaction | ValueError]]) -> List[tuple[int, str]]:
+        # um lote pode tocar qualquer conta e o rollback regrava saldos: trava tudo
+        with self._allLocks():
+            return super()._applyChunk(chunk)
+
+    def accountsByBalance(self, minBalance: float = float("-inf"), maxBalance: float = float("inf"),
+                          clientId: str | None = None, typeId: str | None = None) -> List[Account]:
+        # o refresh do índice lê saldos e esvazia _dirty: nada pode mudar no meio
+        with self._clientsLock, self._allLocks():
+            return super().accountsByBalance(minBalance, maxBalance, clientId, typeId)
+
+
+def benchConcurrentAgency(threadCounts: tuple[int, ...] = (1, 2, 4, 8), opsPerThread: int = 100_000,
+                          clients: int = 1000) -> None:
+    """
+    Transferências aleatórias em paralelo; confere que a soma dos saldos não muda.
+    No CPython com GIL as operações são Python puro e ops/s NÃO cresce com
+    o número de threads: o que se mede é a correção e o custo dos locks.
+    Só num build free-threaded (sem GIL) os stripes deixam as threads escalar.
+    """
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"GIL {'ativo: não espere ganho com mais threads' if gil else 'desativado'}")
+    for n in threadCounts:
+        agency = ConcurrentAgency()
+        for i in range(clients):
+            agency.addClient(f"c{i}", f"cliente{i}")
+        ids = list(agency.accounts)
+        for accId in ids:
+            agency.deposit(accId, 1000.0)
+        total = sum(a.getBalance() for a in agency.accounts.values())
+
+        def worker(seed: int) -> None:
+            rnd = random.Random(seed)
+            for _ in range(opsPerThread):
+                src, dst = rnd.choice(ids), rnd.choice(ids)
+                try:
+                    agency.transfer(src, dst, rnd.randint(1, 50))
+                except ValueError:
+                    pass  # saldo insuficiente
+
+        threads = [threading.Thread(target=worker, args=(s,)) for s in range(n)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        final = sum(a.getBalance() for a in agency.accounts.values())
+        print(f"threads={n} ops/s={n * opsPerThread / elapsed:,.0f} "
+              f"soma={'ok' if final == total else 'ERRO'} ({final:.2f})")
+
+
+
+class BalanceLedger:
+    """
+    Saldos guardados em arrays de double, um array por tipo de conta.
+    A atualização mensal passa por cada array de uma vez, sem chamar o
+    updateMonthly() de cada conta.
+    """
+
+    def __init__(self):
+        self._balances: Dict[str, array] = {"CC": array("d"), "PP": array("d")}
+
+    def allocate(self, typeId: str) -> int:
+        col = self._balances[typeId]
+        col.append(0.0)
+        return len(col) - 1
+
+    def get(self, typeId: str, slot: int) -> float:
+        return self._balances[typeId][slot]
+
+    def set(self, typeId: str, slot: int, value: float) -> None:
+        self._balances[typeId][slot] = value
+
+    def updateMonthly(self) -> None:
+        # mesmas operações de CheckingAccount/SavingsAccount.updateMonthly
+        cc = self._balances["CC"]
+        fee = CheckingAccount.monthlyFee
+        cc[:] = array("d", [b - fee for b in cc])
+        pp = self._balances["PP"]
+        factor = 1.0 + SavingsAccount.monthlyInterest
+        pp[:] = array("d", [b * factor for b in pp])
+
+
+class _LedgerBalance:
+    """Mixin: o _balance da conta passa a morar numa posição do BalanceLedger."""
+    _ledger: BalanceLedger
+    _slot: int
+    _typeId: str
+
+    @property
+    def _balance(self) -> float:
+        return self._ledger.get(self._typeId, self._slot)
+
+    @_balance.setter
+    def _balance(self, value: float) -> None:
+        self._ledger.set(self._typeId, self._slot, value)
+
+
+class LedgerCheckingAccount(_LedgerBalance, CheckingAccount):
+    def __init__(self, accId: int, clientId: str, ledger: BalanceLedger):
+        self._ledger = ledger
+        self._slot = ledger.allocate("CC")
+        super().__init__(accId, clientId)
+
+
+class LedgerSavingsAccount(_LedgerBalance, SavingsAccount):
+    def __init__(self, accId: int, clientId: str, ledger: BalanceLedger):
+        self._ledger = ledger
+        self._slot = ledger.allocate("PP")
+        super().__init__(accId, clientId)
+
+
+class LedgerAgency(Agency):
+    """Agency cujas contas guardam o saldo num BalanceLedger compartilhado."""
+
+    def __init__(self):
+        super().__init__()
+        self.ledger = BalanceLedger()
+
+    def _newCheckingAccount(self, accId: int, clientId: str) -> Account:
+        return LedgerCheckingAccount(accId, clientId, self.ledger)
+
+    def _newSavingsAccount(self, accId: int, clientId: str) -> Account:
+        return LedgerSavingsAccount(accId, clientId, self.ledger)
+
+    def updateMonthly(self) -> None:
+        self.ledger.updateMonthly()
+        self._dirty.update(self.accounts)
+
+
+
+class _CentsBalance(Account):
+    """
+    Saldo guardado como inteiro de centavos: soma e subtração são exatas,
+    então taxas e juros repetidos não acumulam erro de ponto flutuante.
+    _balance continua existindo (em reais) para getBalance() e __str__.
+    deposit/withdraw recebem reais e pagam uma conversão para centavos por
+    chamada (cerca de metade da velocidade de Account com float); em laços
+    quentes use depositCents/withdrawCents, que não convertem nada.
+    """
+    _cents: int = 0
+
+    @property
+    def _balance(self) -> float:
+        return self._cents / 100
+
+    @_balance.setter
+    def _balance(self, value: float) -> None:
+        self._cents = round(value * 100)
+
+    def depositCents(self, cents: int) -> None:
+        if cents <= 0:
+            raise ValueError("fail: valor de depósito deve ser positivo")
+        self._cents += cents
+
+    def withdrawCents(self, cents: int) -> None:
+        if cents <= 0:
+            raise ValueError("fail: valor de saque deve ser positivo")
+        if self._cents < cents:
+            raise ValueError("fail: saldo insuficiente")
+        self._cents -= cents
+
+    def deposit(self, value: float) -> None:
+        # uma comparação só: rejeita também valores que arredondam para 0 centavo
+        cents = round(value * 100)
+        if cents <= 0:
+            raise ValueError("fail: valor de depósito deve ser positivo")
+        self._cents += cents
+
+    def withdraw(self, value: float) -> None:
+        cents = round(value * 100)
+        if cents <= 0:
+            raise ValueError("fail: valor de saque deve ser positivo")
+        if self._cents < cents:
+            raise ValueError("fail: saldo insuficiente")
+        self._cents -= cents
+
+
+class CentsCheckingAccount(_CentsBalance, CheckingAccount):
+    def updateMonthly(self) -> None:
+        self._cents -= round(self.monthlyFee * 100)
+
+
+class CentsSavingsAccount(_CentsBalance, SavingsAccount):
+    def updateMonthly(self) -> None:
+        # juros arredondados para o centavo mais próximo a cada mês
+        self._cents = round(self._cents * (1.0 + self.monthlyInterest))
+
+
+class CentsAgency(Agency):
+    """Agency cujas contas guardam o saldo em centavos inteiros."""
+
+    def _newCheckingAccount(self, accId: int, clientId: str) -> Account:
+        return CentsCheckingAccount(accId, clientId)
+
+    def _newSavingsAccount(self, accId: int, clientId: str) -> Account:
+        return CentsSavingsAccount(accId, clientId)
+
+
+def benchBalanceBackends(ops: int = 10_000_000) -> None:
+    """Compara depósito/saque em float, centavos inteiros e Decimal."""
+    def run(nome: str, deposit, withdraw, amount) -> None:
+        start = time.perf_counter()
+        for _ in range(ops // 2):
+            deposit(amount)
+            withdraw(amount)
+        elapsed = time.perf_counter() - start
+        print(f"{nome:14s} {ops / elapsed:>14,.0f} ops/s")
+
+    acc = CheckingAccount(1, "c")
+    run("float", acc.deposit, acc.withdraw, 12.34)
+    cents = CentsCheckingAccount(2, "c")
+    run("centavos", cents.depositCents, cents.withdrawCents, 1234)
+    run("centavos(R$)", cents.deposit, cents.withdraw, 12.34)
+
+    saldo = [Decimal("0.00")]
+
+    def decDeposit(v: Decimal) -> None:
+        if v <= 0:
+            raise ValueError("fail: valor de depósito deve ser positivo")
+        saldo[0] += v
+
+    def decWithdraw(v: Decimal) -> None:
+        if v <= 0:
+            raise ValueError("fail: valor de saque deve ser positivo")
+        if saldo[0] < v:
+            raise ValueError("fail: saldo insuficiente")
+        saldo[0] -= v
+
+    run("Decimal", decDeposit, decWithdraw, Decimal("12.34"))
+
+
+class OperationLog:
+    """
+    Log de operações só de acréscimo, em registros de tamanho fixo num
+    arquivo mapeado em memória (mmap). Cada registro: (tick, accId, op, valor).
+    O arquivo cresce dobrando de tamanho; `count` diz quantos registros valem.
+    """
+    RECORD = struct.Struct("<qqBd")
+    DEPOSIT = 1
+    WITHDRAW = 2
+    MONTHLY = 3  # accId = -1: vale para todas as contas
+    CREATE = 4   # conta aberta no tick do registro; valor não usado
+    _OP_OFFSET = 16  # posição do byte de op dentro do registro
+
+    def __init__(self, path: str, initialRecords: int = 1024):
+        """Cria um log vazio em path, substituindo o arquivo se existir (para continuar um, use reopen)."""
+        self.path = path
+        self.count = 0
+        self._file = open(path, "w+b")
+        self._file.truncate(initialRecords * self.RECORD.size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+
+    @classmethod
+    def reopen(cls, path: str, initialRecords: int = 1024) -> OperationLog:
+        """
+        Abre um log já existente para continuar acrescentando. close() apara o
+        arquivo em `count` registros; se ele não foi fechado, a cauda ainda tem
+        registros zerados (op 0), que são descartados.
+        """
+        log = cls.__new__(cls)
+        log.path = path
+        log._file = open(path, "r+b")
+        size = cls.RECORD.size
+        length = log._file.seek(0, 2)
+        if length < size:
+            log._file.truncate(initialRecords * size)  # mmap não mapeia arquivo vazio
+        log._map = mmap.mmap(log._file.fileno(), 0)
+        count = length // size
+        while count and log._map[(count - 1) * size + cls._OP_OFFSET] == 0:
+            count -= 1
+        log.count = count
+        return log
+
+    def append(self, tick: int, op: int, accId: int, value: float) -> None:
+        size = self.RECORD.size
+        if (self.count + 1) * size > len(self._map):
+            self._map.flush()
+            self._map.close()
+            self._file.truncate(2 * (self.count + 1) * size)
+            self._map = mmap.mmap(self._file.fileno(), 0)
+        self.RECORD.pack_into(self._map, self.count * size, tick, accId, op, value)
+        self.count += 1
+
+    def records(self, start: int = 0) -> Iterator[tuple[int, int, int, float]]:
+        """Registros (tick, accId, op, valor) a partir da posição start."""
+        size = self.RECORD.size
+        view = memoryview(self._map)[start * size:self.count * size]
+        try:
+            yield from self.RECORD.iter_unpack(view)
+        finally:
+            view.release()
+
+    def flush(self) -> None:
+        self._map.flush()
+
+    def close(self) -> None:
+        self._map.flush()
+        self._map.close()
+        self._file.truncate(self.count * self.RECORD.size)
+        self._file.close()
+
+
+class AuditedAgency(Agency):
+    """
+    Agency que registra cada operação bem-sucedida num OperationLog e tira
+    um snapshot de todos os saldos a cada `snapshotEvery` registros.
+    Cada operação recebe um tick (relógio lógico crescente); balanceAt()
+    parte do snapshot mais próximo e reaplica só os registros seguintes.
+    Ao lado do log ficam logPath + ".snap" (snapshots) e logPath + ".clients"
+    (clientes na ordem de cadastro), que permitem reabri-lo com reopen().
+    Os saldos dos snapshots ficam só no .snap; na memória fica um índice
+    pequeno, e balanceAt lê do arquivo apenas o saldo de que precisa.
+    """
+    SNAPSHOT_HEADER = struct.Struct("<qqq")  # tick, posição no log, nº de saldos
+
+    def __init__(self, logPath: str, snapshotEvery: int = 10_000):
+        super().__init__()
+        self.log = OperationLog(logPath)
+        self.snapshotEvery = snapshotEvery
+        self.tick = 0
+        # (tick, posição no log, offset dos saldos no .snap, nº de saldos)
+        self._snapshots: List[tuple[int, int, int, int]] = [(0, 0, 0, 0)]
+        self._sinceSnapshot = 0
+        self._snapshotFile = open(logPath + ".snap", "w+b")
+        self._clientsFile = open(logPath + ".clients", "w", encoding="utf-8")
+
+    @classmethod
+    def reopen(cls, logPath: str, snapshotEvery: int = 10_000) -> AuditedAgency:
+        """
+        Reabre uma agência auditada: recadastra os clientes (mesmos accIds),
+        carrega os snapshots gravados e reaplica o log depois do último deles
+        para reconstruir os saldos atuais e o tick.
+        """
+        agency = cls.__new__(cls)
+        Agency.__init__(agency)
+        agency.log = OperationLog.reopen(logPath)
+        agency.snapshotEvery = snapshotEvery
+        with open(logPath + ".clients", encoding="utf-8") as f:
+            for line in f:
+                clientId, name = line.rstrip("\n").split("\t")
+                Agency.addClient(agency, clientId, name)
+        agency._snapshots = [(0, 0, 0, 0)]
+        header = cls.SNAPSHOT_HEADER
+        f = agency._snapshotFile = open(logPath + ".snap", "r+b")
+        end = f.seek(0, 2)
+        offset = f.seek(0)
+        while offset + header.size <= end:
+            tick, pos, n = header.unpack(f.read(header.size))
+            offset += header.size
+            if pos > agency.log.count or offset + 8 * n > end:
+                break  # snapshot depois do fim válido do log, ou pela metade
+            agency._snapshots.append((tick, pos, offset, n))
+            offset = f.seek(offset + 8 * n)
+        snapTick, start, offset, n = agency._snapshots[-1]
+        snap = array("d")
+        f.seek(offset)
+        snap.frombytes(f.read(8 * n))
+        current = {i: snap[i] for i in agency.accounts if i < n}
+        last = agency._replay(current, start, float("inf"))
+        for accId, balance in current.items():
+            agency.accounts[accId]._balance = balance
+        agency._dirty.update(current)
+        agency.tick = max(snapTick, last)
+        agency._sinceSnapshot = agency.log.count - start
+        agency._clientsFile = open(logPath + ".clients", "a", encoding="utf-8")
+        return agency
+
+    def _record(self, op: int, accId: int, value: float) -> None:
+        self.log.append(self.tick, op, accId, value)
+        self._sinceSnapshot += 1
+
+    def _endOperation(self) -> None:
+        if self._sinceSnapshot >= self.snapshotEvery:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        balances = array("d", bytes(8 * self.nextAccountId))
+        for accId, acc in self.accounts.items():
+            balances[accId] = acc.getBalance()
+        f = self._snapshotFile
+        f.seek(0, 2)  # balanceAt pode ter deixado a posição no meio do arquivo
+        f.write(self.SNAPSHOT_HEADER.pack(self.tick, self.log.count, len(balances)))
+        self._snapshots.append((self.tick, self.log.count, f.tell(), len(balances)))
+        f.write(balances.tobytes())
+        f.flush()
+        self._sinceSnapshot = 0
+
+    def addClient(self, clientId: str, name: str) -> None:
+        if "\t" in clientId or "\t" in name or "\n" in clientId or "\n" in name:
+            raise ValueError("fail: nome inválido")
+        first = self.nextAccountId
+        super().addClient(clientId, name)
+        self._clientsFile.write(f"{clientId}\t{name}\n")
+        self._clientsFile.flush()  # como o mmap do log, sobrevive a um fim abrupto do processo
+        # abrir conta não avança o tick: só as mensalidades seguintes no log valem para ela
+        for accId in range(first, self.nextAccountId):
+            self._record(OperationLog.CREATE, accId, 0.0)
+        self._endOperation()
+
+    def deposit(self, accId: int, value: float) -> None:
+        super().deposit(accId, value)
+        self.tick += 1
+        self._record(OperationLog.DEPOSIT, accId, value)
+        self._endOperation()
+
+    def withdraw(self, accId: int, value: float) -> None:
+        super().withdraw(accId, value)
+        self.tick += 1
+        self._record(OperationLog.WITHDRAW, accId, value)
+        self._endOperation()
+
+    def transfer(self, fromAccId: int, toAccId: int, value: float) -> None:
+        super().transfer(fromAccId, toAccId, value)
+        self.tick += 1
+        self._record(OperationLog.WITHDRAW, fromAccId, value)
+        self._record(OperationLog.DEPOSIT, toAccId, value)
+        self._endOperation()
+
+    def updateMonthly(self) -> None:
+        super().updateMonthly()
+        self.tick += 1
+        self._record(OperationLog.MONTHLY, -1, 0.0)
+        self._endOperation()
+
+    def _applyChunk(self, chunk: List[tuple[int, Transaction | ValueError]]) -> List[tuple[int, str]]:
+        errors = super()._applyChunk(chunk)
+        if errors:
+            return errors
+        for _, (op, fromId, toId, value) in chunk:  # type: ignore[misc]
+            self.tick += 1
+            if op == "deposit":
+                self._record(OperationLog.DEPOSIT, fromId, value)
+            elif op == "withdraw":
+                self._record(OperationLog.WITHDRAW, fromId, value)
+            else:
+                self._record(OperationLog.WITHDRAW, fromId, value)
+                self._record(OperationLog.DEPOSIT, toId, value)
+        self._endOperation()
+        return errors
+
+    def _replay(self, balances: Dict[int, float], start: int, tick: float,
+                only: int | None = None) -> int:
+        """
+        Reaplica sobre balances (accId -> saldo das contas já abertas) os
+        registros do log a partir de start, até o tick dado. Uma mensalidade
+        só vale para as contas presentes em balances naquele ponto do log.
+        Com only, acompanha só essa conta. Retorna o tick do último registro lido.
+        """
+        fee = CheckingAccount.monthlyFee
+        factor = 1.0 + SavingsAccount.monthlyInterest
+        checking = {i for i in balances if self.accounts[i].getTypeId() == "CC"}
+        last = 0
+        for recTick, recAcc, op, value in self.log.records(start):
+            if recTick > tick:
+                break
+            last = recTick
+            if op == OperationLog.MONTHLY:
+                for accId in balances:
+                    if accId in checking:
+                        balances[accId] -= fee
+                    else:
+                        balances[accId] *= factor
+            elif only is not None and recAcc != only:
+                continue
+            elif op == OperationLog.CREATE:
+                balances[recAcc] = 0.0
+                if self.accounts[recAcc].getTypeId() == "CC":
+                    checking.add(recAcc)
+            elif op == OperationLog.DEPOSIT:
+                balances[recAcc] += value
+            else:
+                balances[recAcc] -= value
+        return last
+
+    def balanceAt(self, accId: int, tick: int) -> float:
+        """Saldo da conta logo após a operação de número `tick` (0.0 se ainda não existia)."""
+        if accId not in self.accounts:
+            raise ValueError("fail: conta inexistente")
+        pos = bisect_right(self._snapshots, tick, key=lambda s: s[0]) - 1
+        _, start, offset, n = self._snapshots[pos]
+        balances: Dict[int, float] = {}
+        if accId < n:
+            self._snapshotFile.seek(offset + 8 * accId)
+            balances[accId] = struct.unpack("d", self._snapshotFile.read(8))[0]  # mesmo formato do array("d")
+        self._replay(balances, start, tick, only=accId)
+        return balances.get(accId, 0.0)
+
+    def close(self) -> None:
+        self.log.close()
+        self._snapshotFile.close()
+        self._clientsFile.close()
+
+
+def _shardWorker(conn: Connection) -> None:
+    """
+    Processo de um shard: guarda as contas que são dele e atende comandos
+    (cmd, *args) recebidos pelo pipe, respondendo ("ok", resultado) ou ("err", msg).
+    Transferências entre shards usam duas fases: prepare reserva o valor
+    (saída) ou só valida a conta (entrada); commit efetiva; abort descarta.
+    """
+    accounts: Dict[int, Account] = {}
+    reserved: Dict[int, float] = {}                # accId -> valor reservado para saída
+    pending: Dict[int, tuple[int, float]] = {}     # txId -> (accId, delta)
+
+    def get(accId: int) -> Account:
+        acc = accounts.get(accId)
+        if acc is None:
+            raise ValueError("fail: conta inexistente")
+        return acc
+
+    def withdraw(accId: int, value: float) -> None:
+        acc = get(accId)
+        if value > 0 and acc.getBalance() - reserved.get(accId, 0.0) < value:
+            raise ValueError("fail: saldo insuficiente")
+        acc.withdraw(value)
+
+    while True:
+        msg = conn.recv()
+        cmd = msg[0]
+        try:
+            result: object = None
+            if cmd == "stop":
+                conn.send(("ok", None))
+                break
+            elif cmd == "create":
+                _, accId, clientId, typeId = msg
+                accounts[accId] = CheckingAccount(accId, clientId) if typeId == "CC" else SavingsAccount(accId, clientId)
+            elif cmd == "deposit":
+                get(msg[1]).deposit(msg[2])
+            elif cmd == "withdraw":
+                withdraw(msg[1], msg[2])
+            elif cmd == "transfer":
+                _, fromId, toId, value = msg
+                dst = get(toId)
+                withdraw(fromId, value)
+                dst.deposit(value)
+            elif cmd == "prepare":
+                _, txId, accId, delta = msg
+                acc = get(accId)
+                if delta < 0:
+                    if acc.getBalance() - reserved.get(accId, 0.0) < -delta:
+                        raise ValueError("fail: saldo insuficiente")
+                    reserved[accId] = reserved.get(accId, 0.0) + -delta
+                pending[txId] = (accId, delta)
+            elif cmd == "commit":
+                accId, delta = pending.pop(msg[1])
+                if delta < 0:
+                    reserved[accId] -= -delta
+                    if reserved[accId] == 0.0:
+                        del reserved[accId]
+                    accounts[accId].withdraw(-delta)
+                else:
+                    accounts[accId].deposit(delta)
+            elif cmd == "abort":
+                accId, delta = pending.pop(msg[1])
+                if delta < 0:
+                    reserved[accId] -= -delta
+                    if reserved[accId] == 0.0:
+                        del reserved[accId]
+            elif cmd == "updateMonthly":
+                for acc in accounts.values():
+                    acc.updateMonthly()
+            elif cmd == "balance":
+                result = get(msg[1]).getBalance()
+            elif cmd == "total":
+                result = sum(a.getBalance() for a in accounts.values())
+            elif cmd == "depositMany":
+                # ids e valores chegam como bytes de array, baratos de serializar
+                ids, values = array("q", msg[1]), array("d", msg[2])
+                failed = 0
+                for accId, value in zip(ids, values):
+                    try:
+                        get(accId).deposit(value)
+                    except ValueError:
+                        failed += 1
+                result = failed
+            else:
+                raise ValueError(f"fail: comando inválido {cmd}")
+            conn.send(("ok", result))
+        except ValueError as e:
+            conn.send(("err", str(e)))
+        except Exception as e:
+            # argumento de tipo errado etc.: responde o erro e segue servindo
+            conn.send(("err", f"fail: {type(e).__name__}: {e}"))
+
+
+class ShardedAgency:
+    """
+    Agency dividida entre processos: a conta N mora no shard N % shards.
+    O roteador (este objeto) numera as contas e encaminha cada operação ao
+    shard dono. Transferência entre shards diferentes segue duas fases
+    (prepare nos dois lados, depois commit ou abort), então o dinheiro
+    nunca é criado nem destruído mesmo se um dos lados recusar.
+    """
+
+    def __init__(self, shards: int = 4):
+        if shards <= 0:
+            raise ValueError("fail: número de shards deve ser positivo")
+        self._conns: List[Connection] = []
+        self._procs: List[multiprocessing.Process] = []
+        for _ in range(shards):
+            parent, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=_shardWorker, args=(child,), daemon=True)
+            proc.start()
+            self._conns.append(parent)
+            self._procs.append(proc)
+        self.clients: Dict[str, List[int]] = {}
+        self.nextAccountId: int = 1
+        self._nextTxId: int = 1
+
+    def shardOf(self, accId: int) -> int:
+        return accId % len(self._conns)
+
+    def _call(self, shard: int, *msg: object) -> object:
+        conn = self._conns[shard]
+        conn.send(msg)
+        status, result = conn.recv()
+        if status == "err":
+            raise ValueError(result)
+        return result
+
+    def _gather(self) -> List[object]:
+        """Lê a resposta de todos os shards; depois, se algum falhou, levanta o primeiro erro."""
+        replies = [conn.recv() for conn in self._conns]
+        for status, result in replies:
+            if status == "err":
+                raise ValueError(result)
+        return [result for _, result in replies]
+
+    @staticmethod
+    def _checkValue(value: float, message: str) -> None:
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+            raise ValueError("fail: valor inválido")
+        if value <= 0:
+            raise ValueError(message)
+
+    def addClient(self, clientId: str, name: str) -> None:
+        if clientId in self.clients:
+            raise ValueError("fail: cliente já existe")
+        ids: List[int] = []
+        for typeId in ("CC", "PP"):
+            accId = self.nextAccountId
+            self.nextAccountId += 1
+            self._call(self.shardOf(accId), "create", accId, clientId, typeId)
+            ids.append(accId)
+        self.clients[clientId] = ids
+
+    def deposit(self, accId: int, value: float) -> None:
+        self._checkValue(value, "fail: valor de depósito deve ser positivo")
+        self._call(self.shardOf(accId), "deposit", accId, value)
+
+    def withdraw(self, accId: int, value: float) -> None:
+        self._checkValue(value, "fail: valor de saque deve ser positivo")
+        self._call(self.shardOf(accId), "withdraw", accId, value)
+
+    def transfer(self, fromAccId: int, toAccId: int, value: float) -> None:
+        self._checkValue(value, "fail: valor de saque deve ser positivo")
+        src, dst = self.shardOf(fromAccId), self.shardOf(toAccId)
+        if src == dst:
+            self._call(src, "transfer", fromAccId, toAccId, value)
+            return
+        txId = self._nextTxId
+        self._nextTxId += 1
+        self._call(src, "prepare", txId, fromAccId, -value)
+        try:
+            self._call(dst, "prepare", txId, toAccId, value)
+        except ValueError:
+            self._call(src, "abort", txId)
+            raise
+        self._call(src, "commit", txId)
+        self._call(dst, "commit", txId)
+
+    def updateMonthly(self) -> None:
+        for conn in self._conns:
+            conn.send(("updateMonthly",))
+        self._gather()
+
+    def getBalance(self, accId: int) -> float:
+        return float(self._call(self.shardOf(accId), "balance", accId))  # type: ignore[arg-type]
+
+    def totalBalance(self) -> float:
+        for conn in self._conns:
+            conn.send(("total",))
+        return sum(self._gather())  # type: ignore[arg-type]
+
+    def depositMany(self, perShard: List[tuple[array, array]]) -> int:
+        """
+        Depósitos já separados por shard: perShard[s] = (ids 'q', valores 'd').
+        Envia para todos os shards antes de esperar, então eles trabalham em
+        paralelo. Retorna quantos depósitos falharam.
+        """
+        if len(perShard) != len(self._conns):
+            raise ValueError(f"fail: esperado um par (ids, valores) por shard ({len(self._conns)})")
+        for conn, (ids, values) in zip(self._conns, perShard):
+            conn.send(("depositMany", ids.tobytes(), values.tobytes()))
+        return sum(self._gather())  # type: ignore[arg-type]
+
+    def close(self) -> None:
+        for conn in self._conns:
+            conn.send(("stop",))
+            conn.recv()
+        for proc in self._procs:
+            proc.join()
+
+
+def benchShardedAgency(shardCounts: tuple[int, ...] = (1, 2, 4), ops: int = 2_000_000,
+                       clients: int = 10_000, batch: int = 50_000) -> None:
+    """Depósitos em lotes roteados para os shards; mede ops/s por quantidade de shards."""
+    for n in shardCounts:
+        agency = ShardedAgency(n)
+        for i in range(clients):
+            agency.addClient(f"c{i}", f"cliente{i}")
+        rnd = random.Random(n)
+        lastId = agency.nextAccountId - 1
+        batches: List[List[tuple[array, array]]] = []
+        for _ in range(ops // batch):
+            perShard = [(array("q"), array("d")) for _ in range(n)]
+            for _ in range(batch):
+                accId = rnd.randint(1, lastId)
+                ids, values = perShard[accId % n]
+                ids.append(accId)
+                values.append(1.0)
+            batches.append(perShard)
+        start = time.perf_counter()
+        for perShard in batches:
+            agency.depositMany(perShard)
+        elapsed = time.perf_counter() - start
+        total = agency.totalBalance()
+        print(f"shards={n} ops/s={len(batches) * batch / elapsed:,.0f} "
+              f"soma={'ok' if total == len(batches) * batch else 'ERRO'}")
+        agency.close()
+
+
+class AsyncAgencyService:
+    """
+    Fachada asyncio para uma Agency. Cada pedido vira um item numa fila
+    limitada (maxPending): quando a fila enche, quem chama espera no
+    await, o que dá backpressure. Um único worker esvazia rajadas de até
+    maxBatch pedidos de uma vez, agrupa os pedidos por conta e junta os
+    depósitos seguidos de uma conta numa única chamada a agency.deposit
+    (exceto numa AuditedAgency, para o log ter um registro por depósito).
+    Qualquer erro da Agency é entregue a quem fez o pedido; pedidos que
+    chegam durante ou depois do close() falham com RuntimeError.
+
+        async with AsyncAgencyService(agency) as service:
+            await service.deposit(1, 100.0)
+    """
+
+    def __init__(self, agency: Agency, maxPending: int = 1024, maxBatch: int = 256):
+        self.agency = agency
+        self.maxPending = maxPending
+        self.maxBatch = maxBatch
+        self._queue: asyncio.Queue[tuple[str, tuple[object, ...], asyncio.Future[None]] | None] | None = None
+        self._worker: asyncio.Task[None] | None = None
+        self._stopped = False
+        # somar depósitos juntaria N registros do log de auditoria num só
+        self._coalesce = not isinstance(agency, AuditedAgency)
+
+    async def __aenter__(self) -> AsyncAgencyService:
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        self._stopped = False
+        self._queue = asyncio.Queue(self.maxPending)
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._queue is None or self._worker is None:
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._queue = self._worker = None
+
+    async def _submit(self, op: str, *args: object) -> None:
+        if self._queue is None:
+            raise RuntimeError("serviço não iniciado")
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        queue, worker = self._queue, self._worker
+        if queue.full() and worker is not None:
+            # espera vaga, mas desiste se o worker terminar (close) antes
+            put = asyncio.ensure_future(queue.put((op, args, future)))
+            try:
+                await asyncio.wait((put, worker), return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                if not put.done():
+                    put.cancel()
+            if put.cancelled():
+                raise RuntimeError("serviço encerrado")
+        else:
+            queue.put_nowait((op, args, future))
+        if self._stopped and not future.done():
+            future.set_exception(RuntimeError("serviço encerrado"))
+        await future
+
+    async def deposit(self, accId: int, value: float) -> None:
+        await self._submit("deposit", accId, value)
+
+    async def withdraw(self, accId: int, value: float) -> None:
+        await self._submit("withdraw", accId, value)
+
+    async def transfer(self, fromAccId: int, toAccId: int, value: float) -> None:
+        await self._submit("transfer", fromAccId, toAccId, value)
+
+    async def _run(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.maxBatch and not queue.empty():
+                batch.append(queue.get_nowait())
+            stop = None in batch
+            cut = batch.index(None) if stop else len(batch)
+            self._applyBatch(batch[:cut])  # type: ignore[arg-type]
+            for request in batch[cut + 1:]:
+                _reject(request)  # pedidos que chegaram depois do close()
+            for _ in batch:
+                queue.task_done()
+            if stop:
+                # o que ficou além deste lote também não será aplicado
+                while not queue.empty():
+                    _reject(queue.get_nowait())
+                    queue.task_done()
+                self._stopped = True
+                return
+
+    def _applyBatch(self, requests: List[tuple[str, tuple[object, ...], asyncio.Future[None]]]) -> None:
+        """
+        Depósitos e saques são agrupados por conta (mantendo a ordem dentro
+        de cada conta); uma transferência fecha o grupo atual antes de ser
+        aplicada, já que mexe em duas contas.
+        """
+        groups: Dict[object, List[tuple[str, tuple[object, ...], asyncio.Future[None]]]] = {}
+        for request in requests:
+            if request[0] == "transfer":
+                self._applyGroups(groups)
+                groups = {}
+                self._applyOne(request)
+            else:
+                groups.setdefault(request[1][0], []).append(request)
+        self._applyGroups(groups)
+
+    def _applyGroups(self, groups: Dict[object, List[tuple[str, tuple[object, ...], asyncio.Future[None]]]]) -> None:
+        for group in groups.values():
+            run: List[tuple[str, tuple[object, ...], asyncio.Future[None]]] = []
+            for request in group:
+                if request[0] == "deposit":
+                    if not request[2].cancelled():
+                        run.append(request)
+                    continue
+                # um saque pode falhar conforme o saldo: fecha os depósitos antes dele
+                self._applyDeposits(run)
+                run = []
+                self._applyOne(request)
+            self._applyDeposits(run)
+
+    def _applyDeposits(self, run: List[tuple[str, tuple[object, ...], asyncio.Future[None]]]) -> None:
+        """
+        Depósitos seguidos numa mesma conta viram um só agency.deposit com a
+        soma. Se algum valor é inválido ou a chamada somada falha, cada pedido
+        é aplicado sozinho para receber o próprio resultado.
+        """
+        if len(run) < 2 or not self._coalesce or not all(_isAmount(args[1]) for _, args, _ in run):
+            for request in run:
+                self._applyOne(request)
+            return
+        accId = run[0][1][0]
+        try:
+            self.agency.deposit(accId, sum(args[1] for _, args, _ in run))  # type: ignore[arg-type, misc]
+        except Exception:
+            for request in run:
+                self._applyOne(request)
+            return
+        for _, _, future in run:
+            future.set_result(None)
+
+    def _applyOne(self, request: tuple[str, tuple[object, ...], asyncio.Future[None]]) -> None:
+        op, args, future = request
+        if future.cancelled():
+            return
+        try:
+            getattr(self.agency, op)(*args)
+        except Exception as e:
+            # qualquer falha vai para quem pediu; o worker precisa seguir vivo
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+
+
+def _isAmount(value: object) -> bool:
+    return not isinstance(value, bool) and isinstance(value, (int, float)) and math.isfinite(value) and value > 0
+
+
+def _reject(request: tuple[str, tuple[object, ...], asyncio.Future[None]] | None) -> None:
+    if request is not None and not request[2].done():
+        request[2].set_exception(RuntimeError("serviço encerrado"))
@@ -0,0 +1,68 @@
+import random
+
+from draft import AuditedAgency
+
+
+def liveBalances(agency):
+    return {accId: acc.getBalance() for accId, acc in agency.accounts.items()}
+
+
+def test_monthly_skips_accounts_opened_later(tmp_path):
+    agency = AuditedAgency(str(tmp_path / "ops.log"))
+    agency.addClient("a", "Ana")
+    agency.deposit(1, 100)
+    agency.updateMonthly()
+    agency.addClient("b", "Bia")
+    agency.deposit(3, 50)
+    assert agency.balanceAt(3, agency.tick) == agency.accounts[3].getBalance() == 50.0
+    assert agency.balanceAt(3, 1) == 0.0
+    agency.close()
+
+
+def test_balance_at_matches_live_balances(tmp_path):
+    rng = random.Random(7)
+    agency = AuditedAgency(str(tmp_path / "ops.log"), snapshotEvery=5)
+    history = []
+    for step in range(400):
+        if step % 37 == 0:
+            agency.addClient(f"c{step}", "x")
+        elif step % 53 == 0:
+            agency.updateMonthly()
+        else:
+            accId = rng.randrange(1, agency.nextAccountId)
+            try:
+                if rng.random() < 0.7:
+                    agency.deposit(accId, rng.randint(1, 100))
+                else:
+                    agency.withdraw(accId, rng.randint(1, 100))
+            except ValueError:
+                pass
+        history.append((agency.tick, liveBalances(agency)))
+    for tick, balances in history:
+        for accId, balance in balances.items():
+            assert abs(agency.balanceAt(accId, tick) - balance) < 1e-9
+    agency.close()
+
+
+def test_reopen_keeps_log_and_snapshots(tmp_path):
+    path = str(tmp_path / "ops.log")
+    agency = AuditedAgency(path, snapshotEvery=3)
+    agency.addClient("a", "Ana")
+    agency.deposit(1, 100)
+    agency.updateMonthly()
+    agency.addClient("b", "Bia")
+    agency.transfer(1, 3, 40)
+    agency.deposit(4, 10)
+    agency.updateMonthly()
+    tick, balances = agency.tick, liveBalances(agency)
+    snapshots = len(agency._snapshots)
+    agency.close()
+
+    reopened = AuditedAgency.reopen(path, snapshotEvery=3)
+    assert reopened.tick == tick
+    assert liveBalances(reopened) == balances
+    assert len(reopened._snapshots) == snapshots
+    reopened.deposit(3, 5)
+    assert reopened.balanceAt(3, tick) == balances[3]
+    assert reopened.balanceAt(3, reopened.tick) == balances[3] + 5
+    reopened.close()
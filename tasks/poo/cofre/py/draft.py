@@ -2,7 +2,7 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from enum import Enum
-from typing import List, Union
+from typing import Iterator, List, Sequence, Tuple, Union
 
 
 
@@ -50,6 +50,25 @@ class CoinType(Enum):
         return self._volume
 
 
+# Tabelas pré-calculadas: evitam passar pelas properties do Enum no caminho quente
+_COIN_TYPES: List[CoinType] = list(CoinType)
+_COIN_INDEX = {ct: i for i, ct in enumerate(_COIN_TYPES)}
+COIN_VALUES: List[float] = [ct.value for ct in _COIN_TYPES]    # por índice de _COIN_TYPES
+COIN_VOLUMES: List[int] = [ct.volume for ct in _COIN_TYPES]
+# denominação em centavos (10, 25, 50, 100) -> CoinType; None onde não há moeda
+COIN_BY_DENOMINATION: List[CoinType | None] = [None] * 101
+for _ct in _COIN_TYPES:
+    COIN_BY_DENOMINATION[round(_ct.value * 100)] = _ct
+
+
+def coinTypeOf(denomination: int) -> CoinType:
+    """CoinType da denominação em centavos (ex.: 50 -> M50)."""
+    ctype = COIN_BY_DENOMINATION[denomination] if 0 <= denomination <= 100 else None
+    if ctype is None:
+        raise ValueError(f"moeda inválida: {denomination}")
+    return ctype
+
+
 class Coin(Valuable):
     def __init__(self, ctype: CoinType):
         self.ctype = ctype
@@ -108,6 +127,10 @@ class Pig:
         self.broken: bool = False
         self.valuables: List[Valuable] = []
         self.volumeMax: int = int(volumeMax)
+        # totais mantidos a cada inserção/extração (mesma ordem de soma que sum())
+        self._volume: int = 0
+        self._value: float = 0
+        self._fleet: PigFleet | None = None  # frota que acompanha este porco
 
     
     def isBroken(self) -> bool:
@@ -120,11 +143,19 @@ class Pig:
     def getVolume(self) -> int:
         if self.broken:
             return 0
-        return sum(v.getVolume() for v in self.valuables)
+        return self._volume
 
     
     def getValue(self) -> float:
-        return sum(v.getValue() for v in self.valuables)
+        return self._value
+
+    def iterValuables(self) -> Iterator[Valuable]:
+        """Conteúdo em ordem de inserção, sem montar lista (vale também para CountedPig)."""
+        return iter(self.valuables)
+
+    def _recount(self) -> None:
+        self._volume = sum(v.getVolume() for v in self.valuables)
+        self._value = sum(v.getValue() for v in self.valuables)
 
     
     def addValuable(self, valuable: Valuable) -> bool:
@@ -140,7 +171,40 @@ class Pig:
         if novo_volume > self.volumeMax:
             print("fail: volume excedido")
             return False
-        self.valuables.append(valuable)
+        self._store(valuable)
+        self._volume += valuable.getVolume()
+        self._value += valuable.getValue()
+        if self._fleet is not None:
+            self._fleet._onAdd(self, valuable, novo_volume - valuable.getVolume())
+        return True
+
+    def addCoins(self, denominations: Sequence[int]) -> bool:
+        """
+        Insere várias moedas (denominações em centavos: 10, 25, 50, 100) com uma
+        única checagem de capacidade: entram todas ou nenhuma.
+        """
+        if self.broken:
+            print("fail: porquinho quebrado, não pode inserir")
+            return False
+        try:
+            types = [coinTypeOf(d) for d in denominations]
+        except (ValueError, TypeError) as e:
+            print(f"fail: {e}")
+            return False
+        counts = [0] * len(_COIN_TYPES)
+        for ct in types:
+            counts[_COIN_INDEX[ct]] += 1
+        added = sum(n * vol for n, vol in zip(counts, COIN_VOLUMES))
+        antes = self._volume
+        if antes + added > self.volumeMax:
+            print("fail: volume excedido")
+            return False
+        self._storeCoins(types)
+        self._volume += added
+        for ct in types:
+            self._value += COIN_VALUES[_COIN_INDEX[ct]]  # mesma ordem de soma de addValuable
+        if self._fleet is not None:
+            self._fleet._onAddCoins(self, counts, antes)
         return True
 
     def breakPig(self) -> bool:
@@ -154,6 +218,8 @@ class Pig:
             print("fail: porquinho já está quebrado")
             return False
         self.broken = True
+        if self._fleet is not None:
+            self._fleet._onBreak(self)
         return True
 
     def getCoins(self) -> List[Coin]:
@@ -164,9 +230,10 @@ class Pig:
         if not self.broken:
             print("fail: porquinho inteiro, não pode obter")
             return []
-        coins: List[Coin] = [v for v in self.valuables if isinstance(v, Coin)]
-        
-        self.valuables = [v for v in self.valuables if not isinstance(v, Coin)]
+        coins = self._takeCoins()
+        self._recount()
+        if self._fleet is not None:
+            self._fleet._onTake(coins)
         return coins
 
     def getItems(self) -> List[Item]:
@@ -177,14 +244,347 @@ class Pig:
         if not self.broken:
             print("fail: porquinho inteiro, não pode obter")
             return []
+        items = self._takeItems()
+        self._recount()
+        if self._fleet is not None:
+            self._fleet._onTake(items)
+        return items
+
+    def addBest(self, pool: List[Valuable]) -> List[Valuable]:
+        """Insere o subconjunto de pool de maior valor que cabe no espaço livre."""
+        if self.broken:
+            print("fail: porquinho quebrado, não pode inserir")
+            return []
+        chosen = planPacking(pool, self.volumeMax - self.getVolume())
+        for v in chosen:
+            self.addValuable(v)
+        return chosen
+
+    # --- armazenamento (sobrescrito por CountedPig) ---
+    def _store(self, valuable: Valuable) -> None:
+        self.valuables.append(valuable)
+
+    def _storeCoins(self, types: List[CoinType]) -> None:
+        self.valuables.extend(Coin(ct) for ct in types)
+
+    def _takeCoins(self) -> List[Coin]:
+        coins: List[Coin] = [v for v in self.valuables if isinstance(v, Coin)]
+        self.valuables = [v for v in self.valuables if not isinstance(v, Coin)]
+        return coins
+
+    def _takeItems(self) -> List[Item]:
         items: List[Item] = [v for v in self.valuables if isinstance(v, Item)]
-       
         self.valuables = [v for v in self.valuables if not isinstance(v, Item)]
         return items
 
+    def _contentsText(self) -> str:
+        return ", ".join(str(v) for v in self.valuables) if self.valuables else "-"
+
    
     def __str__(self) -> str:
         status = "broken" if self.broken else "intact"
-        conteudo = ", ".join(str(v) for v in self.valuables) if self.valuables else "-"
+        conteudo = self._contentsText()
         return (f"Pig({status}) vol={self.getVolume()}/{self.volumeMax} "
                 f"val=R${self.getValue():.2f} contents=[{conteudo}]")
+
+
+
+def _greedyPacking(pool: List[Valuable], volumeMax: int) -> List[Valuable]:
+    """Heurística O(n log n): maior valor por volume primeiro; compara com o melhor item isolado."""
+    chosen: List[Valuable] = []
+    free = volumeMax
+    total = 0.0
+    for v in sorted(pool, key=lambda v: v.getValue() / v.getVolume(), reverse=True):
+        if v.getVolume() <= free:
+            chosen.append(v)
+            free -= v.getVolume()
+            total += v.getValue()
+    fits = [v for v in pool if v.getVolume() <= volumeMax]
+    best = max(fits, key=lambda v: v.getValue(), default=None)
+    if best is not None and best.getValue() > total:
+        return [best]
+    return chosen
+
+
+def planPacking(pool: List[Valuable], volumeMax: int, maxCells: int = 20_000_000) -> List[Valuable]:
+    """
+    Escolhe o subconjunto de pool com maior valor total cujo volume cabe em volumeMax.
+    Mochila 0/1 exata com uma linha de valores por capacidade; moedas do mesmo
+    CoinType são agrupadas em pacotes 1, 2, 4, ... (divisão binária), então
+    muitas moedas iguais custam poucas linhas. Se pacotes x capacidade passar
+    de maxCells, usa a heurística gulosa, de tempo limitado.
+    """
+    if volumeMax <= 0:
+        return []
+    capacity = min(int(volumeMax), sum(v.getVolume() for v in pool))
+    # pacotes (volume, valor, membros)
+    bundles: List[tuple[int, float, List[Valuable]]] = []
+    byType: dict[CoinType, List[Valuable]] = {}
+    for v in pool:
+        if isinstance(v, Coin):
+            byType.setdefault(v.ctype, []).append(v)
+        elif v.getVolume() <= capacity:
+            bundles.append((v.getVolume(), v.getValue(), [v]))
+    for ctype, coins in byType.items():
+        start, size = 0, 1
+        while start < len(coins):
+            members = coins[start:start + size]
+            bundles.append((ctype.volume * len(members), ctype.value * len(members), members))
+            start += size
+            size *= 2
+    bundles = [b for b in bundles if b[0] <= capacity]
+    if len(bundles) * (capacity + 1) > maxCells:
+        return _greedyPacking(pool, volumeMax)
+
+    best: List[float] = [0.0] * (capacity + 1)  # best[c] = maior valor com volume <= c
+    takes: List[bytearray] = []
+    for w, value, _ in bundles:
+        cand = [b + value for b in best[:capacity - w + 1]]
+        old = best[w:]
+        takes.append(bytearray(w) + bytearray(x > y for x, y in zip(cand, old)))
+        best[w:] = [x if x > y else y for x, y in zip(cand, old)]
+
+    chosen: List[Valuable] = []
+    c = capacity
+    for (w, _, members), take in zip(reversed(bundles), reversed(takes)):
+        if take[c]:
+            chosen.extend(members)
+            c -= w
+    return chosen
+
+
+def benchPacking(sizes: tuple[int, ...] = (100, 1_000, 10_000, 100_000), volumeMax: int = 2_000,
+                 seed: int = 0) -> None:
+    """Tempo e valor do planejador (exato ou guloso) para pools de tamanhos diferentes."""
+    import random
+    import time
+    rnd = random.Random(seed)
+    for n in sizes:
+        pool: List[Valuable] = []
+        for i in range(n):
+            if rnd.random() < 0.7:
+                pool.append(Coin(rnd.choice(list(CoinType))))
+            else:
+                pool.append(Item(f"item{i}", rnd.randint(1, 50), round(rnd.uniform(0, 20), 2)))
+        start = time.perf_counter()
+        chosen = planPacking(pool, volumeMax)
+        elapsed = time.perf_counter() - start
+        greedy = _greedyPacking(pool, volumeMax)
+        print(f"n={n:>7} tempo={elapsed * 1000:8.1f}ms valor={sum(v.getValue() for v in chosen):10.2f} "
+              f"guloso={sum(v.getValue() for v in greedy):10.2f}")
+
+
+class _CoinRun:
+    """Sequência de moedas iguais inseridas em seguida."""
+    __slots__ = ("ctype", "count")
+
+    def __init__(self, ctype: CoinType, count: int = 1):
+        self.ctype = ctype
+        self.count = count
+
+
+class CountedPig(Pig):
+    """
+    Pig que não guarda um objeto por moeda: mantém a contagem por CoinType
+    e o conteúdo em ordem de inserção como "runs" (n moedas iguais seguidas
+    viram uma entrada só; itens ficam como estão). Após uma extração, o
+    volume é recalculado pelas contagens e o valor é somado moeda a moeda
+    na ordem de inserção, para dar o mesmo float que Pig.
+    O __str__ e os métodos são os mesmos de Pig, mas `valuables` muda:
+    é uma tupla só de leitura, montada a cada acesso, e as moedas nela
+    são objetos Coin novos (a identidade das moedas inseridas não é
+    guardada). Para inserir, use addValuable/addCoins; para só percorrer,
+    iterValuables, que não monta a tupla.
+    Limitação: a economia vem das moedas iguais seguidas. Com tipos
+    alternados (10, 25, 10, 25, ...) cada moeda vira um run, e o custo
+    fica parecido com o de Pig.
+    """
+
+    def __init__(self, volumeMax: int):
+        self._coinCounts: List[int] = [0] * len(_COIN_TYPES)
+        self._runs: List[Union[_CoinRun, Valuable]] = []
+        super().__init__(volumeMax)
+
+    @property
+    def valuables(self) -> Tuple[Valuable, ...]:  # type: ignore[override]
+        return tuple(self.iterValuables())
+
+    @valuables.setter
+    def valuables(self, values: List[Valuable]) -> None:
+        self._coinCounts = [0] * len(_COIN_TYPES)
+        self._runs = []
+        for v in values:
+            self._store(v)
+
+    def getCoinCount(self, ctype: CoinType) -> int:
+        return self._coinCounts[_COIN_INDEX[ctype]]
+
+    def iterValuables(self) -> Iterator[Valuable]:
+        for r in self._runs:
+            if isinstance(r, _CoinRun):
+                for _ in range(r.count):
+                    yield Coin(r.ctype)
+            else:
+                yield r
+
+    def _store(self, valuable: Valuable) -> None:
+        if isinstance(valuable, Coin):
+            self._coinCounts[_COIN_INDEX[valuable.ctype]] += 1
+            last = self._runs[-1] if self._runs else None
+            if isinstance(last, _CoinRun) and last.ctype is valuable.ctype:
+                last.count += 1
+            else:
+                self._runs.append(_CoinRun(valuable.ctype))
+        else:
+            self._runs.append(valuable)
+
+    def _storeCoins(self, types: List[CoinType]) -> None:
+        runs, counts = self._runs, self._coinCounts
+        for ct in types:
+            counts[_COIN_INDEX[ct]] += 1
+            last = runs[-1] if runs else None
+            if isinstance(last, _CoinRun) and last.ctype is ct:
+                last.count += 1
+            else:
+                runs.append(_CoinRun(ct))
+
+    def _recount(self) -> None:
+        others = [r for r in self._runs if not isinstance(r, _CoinRun)]
+        self._volume = (sum(n * ct.volume for n, ct in zip(self._coinCounts, _COIN_TYPES))
+                        + sum(v.getVolume() for v in others))
+        # valor somado moeda a moeda na ordem de inserção, como Pig faz: n * valor
+        # daria outro arredondamento (10 x M10 = 1.0, e não 0.9999999999999999)
+        value: float = 0
+        for r in self._runs:
+            if isinstance(r, _CoinRun):
+                coinValue = r.ctype.value
+                for _ in range(r.count):
+                    value += coinValue
+            else:
+                value += r.getValue()
+        self._value = value
+
+    def _takeCoins(self) -> List[Coin]:
+        coins: List[Coin] = []
+        for r in self._runs:
+            if isinstance(r, _CoinRun):
+                coins.extend(Coin(r.ctype) for _ in range(r.count))
+        self._runs = [r for r in self._runs if not isinstance(r, _CoinRun)]
+        self._coinCounts = [0] * len(_COIN_TYPES)
+        return coins
+
+    def _takeItems(self) -> List[Item]:
+        items: List[Item] = [r for r in self._runs if isinstance(r, Item)]
+        runs: List[Union[_CoinRun, Valuable]] = []
+        for r in self._runs:
+            if isinstance(r, Item):
+                continue
+            last = runs[-1] if runs else None
+            if isinstance(r, _CoinRun) and isinstance(last, _CoinRun) and last.ctype is r.ctype:
+                last.count += r.count  # moedas que ficaram vizinhas após tirar o item
+            else:
+                runs.append(r)
+        self._runs = runs
+        return items
+
+    def _contentsText(self) -> str:
+        parts: List[str] = []
+        for r in self._runs:
+            if isinstance(r, _CoinRun):
+                parts.extend([str(Coin(r.ctype))] * r.count)
+            else:
+                parts.append(str(r))
+        return ", ".join(parts) if parts else "-"
+
+
+
+class PigFleet:
+    """
+    Conjunto de porquinhos com totais da frota mantidos a cada inserção,
+    quebra e extração (o Pig avisa a frota), então as consultas não
+    percorrem o conteúdo de cada porco.
+    A distribuição de enchimento considera só os porcos inteiros, em
+    BUCKETS faixas de volume/volumeMax (a última é o porco cheio).
+    """
+    BUCKETS = 10
+
+    def __init__(self):
+        self.pigs: List[Pig] = []
+        self._coinCounts: List[int] = [0] * len(_COIN_TYPES)
+        self._itemCount: int = 0
+        self._itemsValue: float = 0
+        self._broken: int = 0
+        self._fill: List[int] = [0] * (self.BUCKETS + 1)
+
+    def _bucket(self, volume: int, volumeMax: int) -> int:
+        return volume * self.BUCKETS // volumeMax
+
+    def add(self, pig: Pig) -> None:
+        if pig._fleet is not None:
+            raise ValueError("porquinho já pertence a uma frota")
+        pig._fleet = self
+        self.pigs.append(pig)
+        for v in pig.iterValuables():
+            self._count(v, 1)
+        if pig.isBroken():
+            self._broken += 1
+        else:
+            self._fill[self._bucket(pig._volume, pig.volumeMax)] += 1
+
+    def _count(self, valuable: Valuable, sign: int) -> None:
+        if isinstance(valuable, Coin):
+            self._coinCounts[_COIN_INDEX[valuable.ctype]] += sign
+        else:
+            self._itemCount += sign
+            self._itemsValue += sign * valuable.getValue()
+
+    # --- avisos vindos do Pig ---
+    def _onAdd(self, pig: Pig, valuable: Valuable, volumeBefore: int) -> None:
+        self._count(valuable, 1)
+        self._moveFill(pig, volumeBefore)
+
+    def _onAddCoins(self, pig: Pig, counts: List[int], volumeBefore: int) -> None:
+        for i, n in enumerate(counts):
+            self._coinCounts[i] += n
+        self._moveFill(pig, volumeBefore)
+
+    def _moveFill(self, pig: Pig, volumeBefore: int) -> None:
+        before = self._bucket(volumeBefore, pig.volumeMax)
+        after = self._bucket(pig._volume, pig.volumeMax)
+        if before != after:
+            self._fill[before] -= 1
+            self._fill[after] += 1
+
+    def _onBreak(self, pig: Pig) -> None:
+        self._fill[self._bucket(pig._volume, pig.volumeMax)] -= 1
+        self._broken += 1
+
+    def _onTake(self, taken: Sequence[Valuable]) -> None:
+        for v in taken:
+            self._count(v, -1)
+
+    # --- consultas ---
+    def __len__(self) -> int:
+        return len(self.pigs)
+
+    def brokenCount(self) -> int:
+        return self._broken
+
+    def intactCount(self) -> int:
+        return len(self.pigs) - self._broken
+
+    def coinCount(self, ctype: CoinType) -> int:
+        return self._coinCounts[_COIN_INDEX[ctype]]
+
+    def valueByCoinType(self) -> dict[CoinType, float]:
+        return {ct: n * ct.value for ct, n in zip(_COIN_TYPES, self._coinCounts)}
+
+    def itemCount(self) -> int:
+        return self._itemCount
+
+    def totalValue(self) -> float:
+        return sum(self.valueByCoinType().values()) + self._itemsValue
+
+    def fillDistribution(self) -> List[int]:
+        """Quantidade de porcos inteiros em cada faixa de enchimento (0-10%, ..., 100%)."""
+        return list(self._fill)
@@ -1,5 +1,13 @@
 
 from abc import ABC, abstractmethod
+from contextlib import redirect_stdout
+import heapq
+import json
+import os
+import random
+from typing import Callable, Sequence, TextIO
+import io
+import sys
 
 
 class Veiculo(ABC):
@@ -67,33 +75,73 @@ class Carro(Veiculo):
 
 
 
+def calcularValores(tipos: Sequence[str], entradas: Sequence[int | None], horaSaida: int) -> list[float]:
+    """
+    Calcula de uma vez o valor de vários veículos para a mesma hora de saída,
+    sem instanciar Veiculo nem passar pelo calcularValor de cada subclasse.
+    Mesmas regras: bike 3.0, moto minutos/20, carro max(5, minutos/10).
+    """
+    if len(tipos) != len(entradas):
+        raise ValueError("tipos e entradas com tamanhos diferentes")
+    if None in entradas:
+        raise ValueError("Veículo sem hora de entrada")
+    invalidos = set(tipos) - {"bike", "moto", "carro"}
+    if invalidos:
+        raise ValueError(f"tipo inválido: {sorted(invalidos)[0]}")
+    saida = int(horaSaida)
+    minutos = [max(0, saida - int(e)) for e in entradas]  # type: ignore[arg-type]
+    return [3.0 if t == "bike" else (m / 20.0 if t == "moto" else max(5.0, m / 10.0))
+            for t, m in zip(tipos, minutos)]
+
+
 class Estacionamento:
     def __init__(self):
-        self.veiculos: list[Veiculo] = []
+        # id -> veículo; o dict mantém a ordem de entrada, com busca e remoção O(1)
+        self.veiculos: dict[str, Veiculo] = {}
         self.horaAtual: int = 0  
 
     
     def procurarVeiculo(self, id: str) -> int:
-        for i, v in enumerate(self.veiculos):
-            if v.getId() == id:
+        """Posição do veículo na ordem de entrada, ou -1 (percorre a lista)."""
+        for i, vid in enumerate(self.veiculos):
+            if vid == id:
                 return i
         return -1
 
+    def buscarVeiculo(self, id: str) -> Veiculo | None:
+        return self.veiculos.get(id)
+
     
+    def entrar(self, veiculo: Veiculo) -> bool:
+        """Registra a entrada sem imprimir; False se o id já está estacionado."""
+        if veiculo.getId() in self.veiculos:
+            return False
+        veiculo.setEntrada(self.horaAtual)
+        self.veiculos[veiculo.getId()] = veiculo
+        return True
+
+    def retirar(self, id: str) -> float:
+        """Cobra e remove o veículo sem imprimir; KeyError se não existir."""
+        valor = self.veiculos[id].calcularValor(self.horaAtual)
+        del self.veiculos[id]
+        return valor
+
+    def valoresAgora(self) -> dict[str, float]:
+        """Quanto cada veículo pagaria se saísse agora (id -> valor)."""
+        vs = list(self.veiculos.values())
+        valores = calcularValores([v.getTipo() for v in vs], [v.getEntrada() for v in vs], self.horaAtual)
+        return dict(zip(self.veiculos, valores))
+
     def estacionar(self, veiculo: Veiculo) -> None:
-        if self.procurarVeiculo(veiculo.getId()) != -1:
+        if not self.entrar(veiculo):
             print("fail: veículo já está estacionado")
-            return
-        veiculo.setEntrada(self.horaAtual)
-        self.veiculos.append(veiculo)
 
    
     def pagar(self, id: str) -> None:
-        idx = self.procurarVeiculo(id)
-        if idx == -1:
+        v = self.veiculos.get(id)
+        if v is None:
             print("fail: veículo inexistente")
             return
-        v = self.veiculos[idx]
         try:
             valor = v.calcularValor(self.horaAtual)
             print(f"valor a pagar ({v.getTipo()} {v.getId()}): R$ {valor:.2f}")
@@ -102,16 +150,13 @@ class Estacionamento:
 
     
     def sair(self, id: str) -> None:
-        idx = self.procurarVeiculo(id)
-        if idx == -1:
+        v = self.veiculos.get(id)
+        if v is None:
             print("fail: veículo inexistente")
             return
-        v = self.veiculos[idx]
         try:
-            valor = v.calcularValor(self.horaAtual)
+            valor = self.retirar(id)
             print(f"{v.getTipo()} {v.getId()} pagou R$ {valor:.2f} e saiu")
-          
-            self.veiculos.pop(idx)
         except Exception as e:
             print(f"fail: {e}")
 
@@ -123,13 +168,223 @@ class Estacionamento:
         self.horaAtual += int(tempo)
 
     def __str__(self) -> str:
-        lista = ", ".join(str(v) for v in self.veiculos) if self.veiculos else ""
+        lista = ", ".join(str(v) for v in self.veiculos.values()) if self.veiculos else ""
         return f"hora={self.horaAtual} min\nveiculos: [{lista}]"
 
 
 
-def main():
-    est = Estacionamento()
+class Simulador:
+    """
+    Simulação por eventos discretos. As chegadas são ordenadas uma vez por
+    minuto de chegada e as saídas ficam numa fila de prioridade (heap), que
+    só cresce até a ocupação do estacionamento. O relógio salta direto de um
+    evento para o próximo em vez de avançar minuto a minuto.
+    """
+
+    def __init__(self, est: Estacionamento | None = None, capacidade: int | None = None):
+        self.est = est if est is not None else Estacionamento()
+        self.capacidade = capacidade
+        self._chegadas: list[tuple[int, int, int, Veiculo]] = []  # (minuto, seq, permanência, veículo)
+        self._proxChegada = 0
+        self._ordenado = True
+        self._saidas: list[tuple[int, int, Veiculo]] = []  # heap (minuto, seq, veículo)
+        self._seq = 0
+        self._proxVeiculo = 0  # ids v0, v1, ... únicos entre chamadas de gerarChegadas
+        self._proxAmostra: int | None = None  # minuto da próxima amostra de executar
+        self.receita: float = 0.0
+        self.atendidos: int = 0
+        self.recusados: int = 0
+
+    def agendarChegada(self, tempo: int, veiculo: Veiculo, permanencia: int) -> None:
+        if tempo < self.est.horaAtual:
+            raise ValueError("evento no passado")
+        self._chegadas.append((int(tempo), self._seq, max(0, int(permanencia)), veiculo))
+        self._seq += 1
+        self._ordenado = False
+
+    def gerarChegadas(self, n: int, duracao: int, permanenciaMedia: float = 120.0,
+                      seed: int | None = None) -> None:
+        """
+        Gera n chegadas aleatórias em [horaAtual, horaAtual + duracao).
+        Os ids continuam a numeração das chamadas anteriores, então não
+        colidem com veículos que ainda estão estacionados.
+        """
+        rnd = random.Random(seed)
+        tipos: tuple[Callable[[str], Veiculo], ...] = (Bike, Moto, Carro)
+        inicio = self.est.horaAtual
+        taxa = 1.0 / permanenciaMedia
+        for i in range(self._proxVeiculo, self._proxVeiculo + n):
+            tempo = inicio + int(rnd.random() * duracao)
+            permanencia = max(1, int(rnd.expovariate(taxa)))
+            self._chegadas.append((tempo, self._seq, permanencia, tipos[int(rnd.random() * 3)](f"v{i}")))
+            self._seq += 1
+        self._proxVeiculo += n
+        self._ordenado = False
+
+    def executar(self, ate: int | None = None, intervalo: int = 60) -> list[tuple[int, int, float]]:
+        """
+        Processa os eventos até o minuto `ate` (ou até acabarem).
+        Retorna amostras (minuto, ocupação, receita acumulada) a cada `intervalo`
+        minutos, cada uma com o estado após todos os eventos daquele minuto.
+        Uma nova chamada continua a grade de amostras da anterior, sem
+        repetir o último minuto já amostrado.
+        """
+        if intervalo <= 0:
+            raise ValueError("intervalo deve ser positivo")
+        if not self._ordenado:
+            pendentes = self._chegadas[self._proxChegada:]
+            pendentes.sort()
+            self._chegadas, self._proxChegada, self._ordenado = pendentes, 0, True
+        est, chegadas, saidas = self.est, self._chegadas, self._saidas
+        veiculos = est.veiculos
+        limite = ate if ate is not None else float("inf")
+        amostras: list[tuple[int, int, float]] = []
+        proxima = est.horaAtual if self._proxAmostra is None else max(self._proxAmostra, est.horaAtual)
+        i = self._proxChegada
+        while True:
+            tChegada = chegadas[i][0] if i < len(chegadas) else None
+            tSaida = saidas[0][0] if saidas else None
+            # no mesmo minuto, saídas antes das chegadas (libera vagas)
+            saida = tSaida is not None and (tChegada is None or tSaida <= tChegada)
+            tempo = tSaida if saida else tChegada
+            if tempo is None or tempo > limite:
+                break
+            while proxima < tempo:
+                amostras.append((proxima, len(veiculos), self.receita))
+                proxima += intervalo
+            est.horaAtual = tempo
+            if saida:
+                v = heapq.heappop(saidas)[2]
+                self.receita += est.retirar(v.getId())
+                self.atendidos += 1
+                continue
+            _, _, permanencia, v = chegadas[i]
+            i += 1
+            if self.capacidade is not None and len(veiculos) >= self.capacidade:
+                self.recusados += 1
+            elif est.entrar(v):
+                heapq.heappush(saidas, (tempo + permanencia, self._seq, v))
+                self._seq += 1
+            else:
+                self.recusados += 1
+        self._proxChegada = i
+        fim = ate if ate is not None else est.horaAtual
+        while proxima <= fim:
+            amostras.append((proxima, len(veiculos), self.receita))
+            proxima += intervalo
+        self._proxAmostra = proxima
+        est.horaAtual = max(est.horaAtual, fim)
+        return amostras
+
+
+class EstacionamentoPersistente(Estacionamento):
+    """
+    Estacionamento com diário (write-ahead log) em disco.
+    Cada entrada/saída/passagem de tempo vira uma linha no journal.log:
+        E <hora> <tipo> <id>  |  S <hora> <id>  |  T <hora>
+    O fsync é feito em lotes de `fsyncEvery` eventos, e a cada `snapshotEvery`
+    eventos o estado completo vai para snapshot.json junto com a posição do
+    journal. A recuperação carrega o snapshot e reaplica só o final do journal.
+    """
+
+    def __init__(self, pasta: str, fsyncEvery: int = 1000, snapshotEvery: int = 10_000):
+        super().__init__()
+        os.makedirs(pasta, exist_ok=True)
+        self._journalPath = os.path.join(pasta, "journal.log")
+        self._snapshotPath = os.path.join(pasta, "snapshot.json")
+        self.fsyncEvery = fsyncEvery
+        self.snapshotEvery = snapshotEvery
+        self._pendentes = 0
+        self._desdeSnapshot = 0
+        self._recuperar()
+        self._journal = open(self._journalPath, "ab")
+
+    # --- recuperação ---
+    def _recuperar(self) -> None:
+        offset = 0
+        if os.path.exists(self._snapshotPath):
+            with open(self._snapshotPath, encoding="utf-8") as f:
+                snap = json.load(f)
+            offset = snap["offset"]
+            self.horaAtual = snap["hora"]
+            for tipo, vid, entrada in snap["veiculos"]:
+                v = _TIPOS[tipo](vid)
+                v.setEntrada(entrada)
+                self.veiculos[vid] = v
+        if not os.path.exists(self._journalPath):
+            return
+        with open(self._journalPath, "r+b") as f:
+            f.seek(offset)
+            valido = offset
+            for linha in f:
+                if not linha.endswith(b"\n"):
+                    break  # última linha cortada por um crash
+                self._aplicar(linha.decode("utf-8").split())
+                valido += len(linha)
+                self._desdeSnapshot += 1
+            f.truncate(valido)
+
+    def _aplicar(self, campos: list[str]) -> None:
+        self.horaAtual = int(campos[1])
+        if campos[0] == "E":
+            Estacionamento.entrar(self, _TIPOS[campos[2]](campos[3]))
+        elif campos[0] == "S":
+            Estacionamento.retirar(self, campos[2])
+
+    # --- escrita ---
+    def _registrar(self, linha: str) -> None:
+        self._journal.write(linha.encode("utf-8"))
+        self._pendentes += 1
+        self._desdeSnapshot += 1
+        if self._pendentes >= self.fsyncEvery:
+            self.sincronizar()
+        if self._desdeSnapshot >= self.snapshotEvery:
+            self.snapshot()
+
+    def sincronizar(self) -> None:
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._pendentes = 0
+
+    def snapshot(self) -> None:
+        self.sincronizar()
+        snap = {
+            "offset": self._journal.tell(),
+            "hora": self.horaAtual,
+            "veiculos": [[v.getTipo(), v.getId(), v.getEntrada()] for v in self.veiculos.values()],
+        }
+        tmp = self._snapshotPath + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snap, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._snapshotPath)
+        self._desdeSnapshot = 0
+
+    def fechar(self) -> None:
+        self.snapshot()
+        self._journal.close()
+
+    # --- operações registradas ---
+    def entrar(self, veiculo: Veiculo) -> bool:
+        if not super().entrar(veiculo):
+            return False
+        self._registrar(f"E {self.horaAtual} {veiculo.getTipo()} {veiculo.getId()}\n")
+        return True
+
+    def retirar(self, id: str) -> float:
+        valor = super().retirar(id)
+        self._registrar(f"S {self.horaAtual} {id}\n")
+        return valor
+
+    def passarTempo(self, tempo: int) -> None:
+        antes = self.horaAtual
+        super().passarTempo(tempo)
+        if self.horaAtual != antes:
+            self._registrar(f"T {self.horaAtual}\n")
+
+
+def mostrarComandos() -> None:
     print("Comandos:")
     print("  in tipo id        -> entra veículo (tipo: bike|moto|carro)")
     print("  pass m            -> avança m minutos")
@@ -139,6 +394,84 @@ def main():
     print("  end               -> encerra")
     print("-" * 60)
 
+
+# ===== Modo lote: mesma saída do REPL, sem input()/print por linha =====
+_TIPOS: dict[str, Callable[[str], Veiculo]] = {"bike": Bike, "moto": Moto, "carro": Carro}
+
+
+def _cmdIn(est: Estacionamento, args: list[str]) -> None:
+    fabrica = _TIPOS.get(args[0])
+    if fabrica is None:
+        print("fail: tipo inválido")
+    else:
+        est.estacionar(fabrica(args[1]))
+
+
+def _cmdPass(est: Estacionamento, args: list[str]) -> None:
+    est.passarTempo(int(args[0]))
+
+
+def _cmdPay(est: Estacionamento, args: list[str]) -> None:
+    est.pagar(args[0])
+
+
+def _cmdOut(est: Estacionamento, args: list[str]) -> None:
+    est.sair(args[0])
+
+
+def _cmdShow(est: Estacionamento, args: list[str]) -> None:
+    print(est)
+
+
+# comando -> (quantidade de partes esperada, tratador)
+COMANDOS: dict[str, tuple[int, Callable[[Estacionamento, list[str]], None]]] = {
+    "in": (3, _cmdIn),
+    "pass": (2, _cmdPass),
+    "pay": (2, _cmdPay),
+    "out": (2, _cmdOut),
+    "show": (1, _cmdShow),
+}
+
+
+def mainLote(inp: TextIO, out: TextIO, flushEvery: int = 4096) -> None:
+    """
+    Lê os comandos de um stream e despacha pela tabela COMANDOS.
+    A saída é acumulada num buffer em memória e escrita em blocos.
+    """
+    est = Estacionamento()
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        mostrarComandos()
+        pendentes = 0
+        for line in inp:
+            parts = line.split()
+            if not parts:
+                continue
+            cmd = parts[0].lower()
+            if cmd == "end":
+                break
+            entry = COMANDOS.get(cmd)
+            if entry is None or entry[0] != len(parts):
+                print("fail: comando inválido")
+            else:
+                try:
+                    entry[1](est, parts[1:])
+                except Exception as e:
+                    print(f"fail: {e}")
+            pendentes += 1
+            if pendentes >= flushEvery:
+                out.write(buf.getvalue())
+                buf.seek(0)
+                buf.truncate()
+                pendentes = 0
+    out.write(buf.getvalue())
+    out.flush()
+
+
+def main():
+    est = Estacionamento()
+    mostrarComandos()
+
     while True:
         try:
             line = input().strip()
@@ -184,4 +517,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if "--batch" in sys.argv[1:]:
+        mainLote(sys.stdin, sys.stdout)
+    else:
+        main()
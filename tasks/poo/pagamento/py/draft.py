@@ -1,5 +1,9 @@
 
 from abc import ABC, abstractmethod
+from contextlib import redirect_stdout
+import asyncio
+import io
+import time
 
 class Pagamento(ABC):
     def __init__(self, valor: float, descricao: str):
@@ -69,6 +73,91 @@ def processar_pagamento(pagamento: Pagamento) -> None:
         print()
 
 
+# ===== Pipeline assíncrono =====
+class GatewayLocal:
+    """Gateway de mentira: só espera `latencia` segundos, como uma chamada de rede."""
+
+    def __init__(self, latencia: float = 0.05):
+        self.latencia = latencia
+
+    async def enviar(self, pagamento: Pagamento) -> None:
+        await asyncio.sleep(self.latencia)
+
+
+class ResultadoPagamento:
+    def __init__(self, pagamento: Pagamento, ok: bool, saida: str, erro: str = ""):
+        self.pagamento = pagamento
+        self.ok = ok
+        self.saida = saida  # o que resumo()/processar() imprimiram
+        self.erro = erro
+
+    def __str__(self) -> str:
+        # mesmo texto que processar_pagamento imprime
+        if self.ok:
+            return self.saida + "\n"
+        return f"{self.saida}Erro: {self.erro}\n\n"
+
+
+async def processar_pagamento_async(pagamento: Pagamento, gateway: GatewayLocal,
+                                    timeout: float | None = None) -> ResultadoPagamento:
+    """
+    validar_valor + resumo, depois o gateway (com timeout), depois processar.
+    As partes síncronas rodam sem await no meio, então dá para capturar o
+    print de cada pagamento sem misturar com os outros.
+    """
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            pagamento.validar_valor()
+            pagamento.resumo()
+        try:
+            await asyncio.wait_for(gateway.enviar(pagamento), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError("tempo esgotado no gateway") from None
+        with redirect_stdout(buf):
+            pagamento.processar()
+    except Exception as e:
+        return ResultadoPagamento(pagamento, False, buf.getvalue(), str(e))
+    return ResultadoPagamento(pagamento, True, buf.getvalue())
+
+
+async def processar_lote(pagamentos: list[Pagamento], gateway: GatewayLocal,
+                         concorrencia: int = 32,
+                         por_metodo: dict[type, int] | None = None,
+                         timeout: float | None = None) -> list[ResultadoPagamento]:
+    """
+    Processa vários pagamentos ao mesmo tempo, com no máximo `concorrencia`
+    em andamento no total e no máximo por_metodo[classe] de cada tipo
+    (Pix, CartaoCredito, Boleto...). Os resultados voltam na ordem de entrada.
+    """
+    if concorrencia <= 0:
+        raise ValueError("concorrência deve ser positiva")
+    geral = asyncio.Semaphore(concorrencia)
+    limites = por_metodo or {}
+    pools = {cls: asyncio.Semaphore(n) for cls, n in limites.items()}
+
+    async def um(pagamento: Pagamento) -> ResultadoPagamento:
+        pool = pools.get(type(pagamento))
+        if pool is None:
+            async with geral:
+                return await processar_pagamento_async(pagamento, gateway, timeout)
+        async with pool, geral:
+            return await processar_pagamento_async(pagamento, gateway, timeout)
+
+    return list(await asyncio.gather(*(um(p) for p in pagamentos)))
+
+
+def bench_pipeline(n: int = 500, latencia: float = 0.01,
+                   concorrencias: tuple[int, ...] = (1, 4, 16, 64)) -> None:
+    """Pagamentos/s com o GatewayLocal para cada nível de concorrência."""
+    gateway = GatewayLocal(latencia)
+    for c in concorrencias:
+        pagamentos: list[Pagamento] = [Pix(10 + i, "bench", "chave", "Banco") for i in range(n)]
+        inicio = time.perf_counter()
+        asyncio.run(processar_lote(pagamentos, gateway, concorrencia=c))
+        tempo = time.perf_counter() - inicio
+        print(f"concorrencia={c:4d} {n / tempo:10.1f} pagamentos/s")
+
 
 if __name__ == "__main__":
     pagamentos: list[Pagamento] = [
@@ -1,9 +1,16 @@
 
 from abc import ABC, abstractmethod
-from math import pi, hypot
+from math import pi, hypot, floor
+from array import array
+from contextlib import redirect_stdout
+from typing import Callable, TextIO
+import io
+import sys
 
 # ===== Interface / Classe Abstrata =====
 class Shape(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def getArea(self) -> float:
         pass
@@ -20,6 +27,41 @@ class Shape(ABC):
     def inside(self, point: "Point2D") -> bool:
         raise NotImplementedError("inside() não implementado para esta forma")
 
+    # Versão em lote: recebe um buffer (N, 2) de coordenadas e devolve a máscara
+    def insideMany(self, points: object) -> list[bool]:
+        raise NotImplementedError("insideMany() não implementado para esta forma")
+
+    # caixa envolvente (min_x, min_y, max_x, max_y), usada pelo índice espacial
+    def getBounds(self) -> "tuple[float, float, float, float]":
+        raise NotImplementedError("getBounds() não implementado para esta forma")
+
+
+def _split_coords(points: object) -> tuple[list[float], list[float]]:
+    """
+    Separa um lote de pontos em listas de x e de y, sem criar Point2D.
+    Aceita qualquer objeto com protocolo de buffer (array('d') com
+    x0 y0 x1 y1 ..., matriz (N, 2) do numpy, contígua ou não) ou uma
+    sequência de pares.
+    """
+    try:
+        mv = memoryview(points)  # type: ignore[arg-type]
+    except TypeError:
+        pares = list(points)  # type: ignore[call-overload]
+        return [float(p[0]) for p in pares], [float(p[1]) for p in pares]
+    if mv.ndim == 1:
+        vals = mv.tolist()  # tolist segue os strides, então 1-D fatiado também serve
+    elif mv.c_contiguous:
+        vals = mv.cast("B").cast(mv.format).tolist()
+    else:
+        # (N, 2) com strides ou em ordem Fortran (coluna fatiada, transposta):
+        # cast exige C-contíguo, então achata as listas aninhadas do tolist
+        vals = mv.tolist()
+        for _ in range(mv.ndim - 1):
+            vals = [v for linha in vals for v in linha]
+    if len(vals) % 2 != 0:
+        raise ValueError("buffer de pontos deve ter tamanho par (N, 2)")
+    return [float(v) for v in vals[0::2]], [float(v) for v in vals[1::2]]
+
 
 # ===== Classe Point2D =====
 class Point2D:
@@ -53,6 +95,15 @@ class Circle(Shape):
         # ponto está dentro se a distância ao centro for <= raio
         return hypot(point.x - self.center.x, point.y - self.center.y) <= self.radius
 
+    def insideMany(self, points: object) -> list[bool]:
+        xs, ys = _split_coords(points)
+        cx, cy, r = self.center.x, self.center.y, self.radius
+        return [hypot(x - cx, y - cy) <= r for x, y in zip(xs, ys)]
+
+    def getBounds(self) -> tuple[float, float, float, float]:
+        c, r = self.center, self.radius
+        return (c.x - r, c.y - r, c.x + r, c.y + r)
+
     def __str__(self) -> str:
         return f"{self.name}: C={self.center}, R={self.radius:.2f}"
 
@@ -63,6 +114,10 @@ class Rectangle(Shape):
         self.name = "Rect"
         self.p1 = p1  # vértice 1 (qualquer posição)
         self.p2 = p2  # vértice oposto
+        # caixa envolvente guardada junto com as coordenadas de onde saiu;
+        # se p1/p2 mudarem (troca do ponto ou x/y alterados), é recalculada
+        self._box_key: tuple[float, float, float, float] | None = None
+        self._box: tuple[float, float, float, float] = (0.0, 0.0, 0.0, 0.0)
 
     def getName(self) -> str:
         return self.name
@@ -81,16 +136,399 @@ class Rectangle(Shape):
         return 2 * (largura + altura)
 
     def inside(self, point: Point2D) -> bool:
-        min_x = min(self.p1.x, self.p2.x)
-        max_x = max(self.p1.x, self.p2.x)
-        min_y = min(self.p1.y, self.p2.y)
-        max_y = max(self.p1.y, self.p2.y)
+        min_x, min_y, max_x, max_y = self.getBounds()
         return (min_x <= point.x <= max_x) and (min_y <= point.y <= max_y)
 
+    def insideMany(self, points: object) -> list[bool]:
+        xs, ys = _split_coords(points)
+        min_x, min_y, max_x, max_y = self.getBounds()
+        return [(min_x <= x <= max_x) and (min_y <= y <= max_y) for x, y in zip(xs, ys)]
+
+    def getBounds(self) -> tuple[float, float, float, float]:
+        p1, p2 = self.p1, self.p2
+        key = (p1.x, p1.y, p2.x, p2.y)
+        if key != self._box_key:
+            self._box = (min(p1.x, p2.x), min(p1.y, p2.y), max(p1.x, p2.x), max(p1.y, p2.y))
+            self._box_key = key
+        return self._box
+
     def __str__(self) -> str:
         return f"{self.name}: P1={self.p1} P2={self.p2}"
 
 
+# ===== Versões compactas (sem __dict__) =====
+class SlimPoint2D:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x: float, y: float):
+        self.x = float(x)
+        self.y = float(y)
+
+    def __str__(self) -> str:
+        return f"({self.x:.2f}, {self.y:.2f})"
+
+
+class SlimCircle(Shape):
+    __slots__ = ("center", "radius")
+    name = "Circ"  # atributo de classe: não ocupa espaço em cada instância
+
+    def __init__(self, center: "Point2D | SlimPoint2D", radius: float):
+        if radius <= 0:
+            raise ValueError("Raio deve ser positivo")
+        self.center = center
+        self.radius = float(radius)
+
+    def getName(self) -> str:
+        return self.name
+
+    def getArea(self) -> float:
+        return pi * (self.radius ** 2)
+
+    def getPerimeter(self) -> float:
+        return 2 * pi * self.radius
+
+    def inside(self, point: "Point2D | SlimPoint2D") -> bool:
+        return hypot(point.x - self.center.x, point.y - self.center.y) <= self.radius
+
+    def insideMany(self, points: object) -> list[bool]:
+        xs, ys = _split_coords(points)
+        cx, cy, r = self.center.x, self.center.y, self.radius
+        return [hypot(x - cx, y - cy) <= r for x, y in zip(xs, ys)]
+
+    def getBounds(self) -> tuple[float, float, float, float]:
+        c, r = self.center, self.radius
+        return (c.x - r, c.y - r, c.x + r, c.y + r)
+
+    def __str__(self) -> str:
+        return f"{self.name}: C={self.center}, R={self.radius:.2f}"
+
+
+class SlimRectangle(Shape):
+    __slots__ = ("p1", "p2")
+    name = "Rect"
+
+    def __init__(self, p1: "Point2D | SlimPoint2D", p2: "Point2D | SlimPoint2D"):
+        self.p1 = p1
+        self.p2 = p2
+
+    def getName(self) -> str:
+        return self.name
+
+    def _dims(self):
+        return abs(self.p1.x - self.p2.x), abs(self.p1.y - self.p2.y)
+
+    def getArea(self) -> float:
+        largura, altura = self._dims()
+        return largura * altura
+
+    def getPerimeter(self) -> float:
+        largura, altura = self._dims()
+        return 2 * (largura + altura)
+
+    def inside(self, point: "Point2D | SlimPoint2D") -> bool:
+        min_x, min_y, max_x, max_y = self.getBounds()
+        return (min_x <= point.x <= max_x) and (min_y <= point.y <= max_y)
+
+    def insideMany(self, points: object) -> list[bool]:
+        xs, ys = _split_coords(points)
+        min_x, min_y, max_x, max_y = self.getBounds()
+        return [(min_x <= x <= max_x) and (min_y <= y <= max_y) for x, y in zip(xs, ys)]
+
+    def getBounds(self) -> tuple[float, float, float, float]:
+        return (min(self.p1.x, self.p2.x), min(self.p1.y, self.p2.y),
+                max(self.p1.x, self.p2.x), max(self.p1.y, self.p2.y))
+
+    def __str__(self) -> str:
+        return f"{self.name}: P1={self.p1} P2={self.p2}"
+
+
+# Variantes imutáveis: atribuições só no construtor
+def _frozen_setattr(self: object, attr: str, value: object) -> None:
+    raise AttributeError(f"{type(self).__name__} é imutável")
+
+
+class FrozenPoint2D(SlimPoint2D):
+    __slots__ = ()
+    __setattr__ = _frozen_setattr
+
+    def __init__(self, x: float, y: float):
+        object.__setattr__(self, "x", float(x))
+        object.__setattr__(self, "y", float(y))
+
+
+class FrozenCircle(SlimCircle):
+    __slots__ = ()
+    __setattr__ = _frozen_setattr
+
+    def __init__(self, center: "Point2D | SlimPoint2D", radius: float):
+        if radius <= 0:
+            raise ValueError("Raio deve ser positivo")
+        object.__setattr__(self, "center", center)
+        object.__setattr__(self, "radius", float(radius))
+
+
+class FrozenRectangle(SlimRectangle):
+    __slots__ = ()
+    __setattr__ = _frozen_setattr
+
+    def __init__(self, p1: "Point2D | SlimPoint2D", p2: "Point2D | SlimPoint2D"):
+        object.__setattr__(self, "p1", p1)
+        object.__setattr__(self, "p2", p2)
+
+
+def bench_memoria(n: int = 1_000_000) -> None:
+    """Compara bytes por forma (tracemalloc) entre as classes normais e as compactas."""
+    import tracemalloc
+
+    def medir(fabrica) -> float:
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        formas = [fabrica(i) for i in range(n)]
+        usado = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+        del formas
+        return usado / n
+
+    casos = [
+        ("Circle", lambda i: Circle(Point2D(i, i), 1 + i)),
+        ("SlimCircle", lambda i: SlimCircle(SlimPoint2D(i, i), 1 + i)),
+        ("FrozenCircle", lambda i: FrozenCircle(FrozenPoint2D(i, i), 1 + i)),
+        ("Rectangle", lambda i: Rectangle(Point2D(i, i), Point2D(i + 1, i + 1))),
+        ("SlimRectangle", lambda i: SlimRectangle(SlimPoint2D(i, i), SlimPoint2D(i + 1, i + 1))),
+        ("FrozenRectangle", lambda i: FrozenRectangle(FrozenPoint2D(i, i), FrozenPoint2D(i + 1, i + 1))),
+    ]
+    for nome, fabrica in casos:
+        print(f"{nome:16s} {medir(fabrica):8.1f} bytes/forma ({n} formas)")
+
+
+# ===== Armazenamento colunar de formas =====
+class ShapeStore:
+    """
+    Guarda as formas em colunas (array de floats) agrupadas por tipo,
+    para calcular áreas e perímetros de toda a coleção em uma passada,
+    sem chamar getArea()/getPerimeter() objeto por objeto.
+    As colunas são uma cópia das coordenadas no momento do add(): se a forma
+    for alterada depois, chame update(i) (ou refresh()) para recopiar.
+    """
+    CIRC = 0
+    RECT = 1
+
+    def __init__(self, shapes: "list[Shape] | None" = None):
+        self._shapes: list[Shape] = []
+        # posição global -> (tipo, índice dentro da coluna do tipo)
+        self._kinds = array("b")
+        self._rows = array("q")
+        # colunas dos círculos
+        self._cx = array("d")
+        self._cy = array("d")
+        self._r = array("d")
+        # colunas dos retângulos
+        self._x1 = array("d")
+        self._y1 = array("d")
+        self._x2 = array("d")
+        self._y2 = array("d")
+        for s in shapes or []:
+            self.add(s)
+
+    def add(self, shape: Shape) -> None:
+        if isinstance(shape, (Circle, SlimCircle)):
+            self._kinds.append(ShapeStore.CIRC)
+            self._rows.append(len(self._r))
+            self._cx.append(shape.center.x)
+            self._cy.append(shape.center.y)
+            self._r.append(shape.radius)
+        elif isinstance(shape, (Rectangle, SlimRectangle)):
+            self._kinds.append(ShapeStore.RECT)
+            self._rows.append(len(self._x1))
+            self._x1.append(shape.p1.x)
+            self._y1.append(shape.p1.y)
+            self._x2.append(shape.p2.x)
+            self._y2.append(shape.p2.y)
+        else:
+            raise ValueError(f"forma não suportada: {shape.getName()}")
+        self._shapes.append(shape)
+
+    def update(self, i: int) -> None:
+        """Recopia para as colunas as coordenadas atuais da forma i."""
+        shape, row = self._shapes[i], self._rows[i]
+        if self._kinds[i] == ShapeStore.CIRC:
+            self._cx[row] = shape.center.x  # type: ignore[attr-defined]
+            self._cy[row] = shape.center.y  # type: ignore[attr-defined]
+            self._r[row] = shape.radius  # type: ignore[attr-defined]
+        else:
+            self._x1[row] = shape.p1.x  # type: ignore[attr-defined]
+            self._y1[row] = shape.p1.y  # type: ignore[attr-defined]
+            self._x2[row] = shape.p2.x  # type: ignore[attr-defined]
+            self._y2[row] = shape.p2.y  # type: ignore[attr-defined]
+
+    def refresh(self) -> None:
+        """Recopia todas as formas (após mutações em massa)."""
+        for i in range(len(self._shapes)):
+            self.update(i)
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def getShape(self, i: int) -> Shape:
+        return self._shapes[i]
+
+    def getShapes(self) -> list[Shape]:
+        return list(self._shapes)
+
+    # --- cálculos por coluna (mesmas fórmulas de Circle e Rectangle) ---
+    def _circleAreas(self) -> list[float]:
+        return [pi * (r ** 2) for r in self._r]
+
+    def _circlePerimeters(self) -> list[float]:
+        return [2 * pi * r for r in self._r]
+
+    def _rectAreas(self) -> list[float]:
+        return [abs(x1 - x2) * abs(y1 - y2)
+                for x1, y1, x2, y2 in zip(self._x1, self._y1, self._x2, self._y2)]
+
+    def _rectPerimeters(self) -> list[float]:
+        return [2 * (abs(x1 - x2) + abs(y1 - y2))
+                for x1, y1, x2, y2 in zip(self._x1, self._y1, self._x2, self._y2)]
+
+    def _merge(self, circ: list[float], rect: list[float]) -> list[float]:
+        grupos = (circ, rect)
+        return [grupos[k][i] for k, i in zip(self._kinds, self._rows)]
+
+    def areas(self) -> list[float]:
+        """Áreas na ordem de inserção."""
+        return self._merge(self._circleAreas(), self._rectAreas())
+
+    def perimeters(self) -> list[float]:
+        """Perímetros na ordem de inserção."""
+        return self._merge(self._circlePerimeters(), self._rectPerimeters())
+
+    def totalArea(self) -> float:
+        return sum(self._circleAreas()) + sum(self._rectAreas())
+
+    def totalPerimeter(self) -> float:
+        return sum(self._circlePerimeters()) + sum(self._rectPerimeters())
+
+
+# ===== Índice espacial (grade de buckets) =====
+class ShapeGrid:
+    """
+    Índice espacial em grade uniforme sobre as caixas envolventes das formas.
+    Cada célula guarda os índices das formas cuja caixa a toca, então uma
+    consulta só testa as formas das células envolvidas, e não a lista inteira.
+    Formas que cobririam células demais ficam numa lista à parte ("grandes").
+    As caixas são guardadas no add(): se uma forma indexada mudar, chame
+    update(idx); remove(idx) a retira (os outros índices não mudam).
+    """
+    MAX_CELLS = 64
+
+    def __init__(self, cellSize: float = 1.0, shapes: "list[Shape] | None" = None):
+        if cellSize <= 0:
+            raise ValueError("tamanho da célula deve ser positivo")
+        self.cellSize = float(cellSize)
+        self.shapes: list[Shape | None] = []  # None = removida
+        self._bounds: list[tuple[float, float, float, float]] = []
+        self._cells: dict[tuple[int, int], list[int]] = {}
+        self._big: list[int] = []
+        self._count = 0
+        for s in shapes or []:
+            self.add(s)
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return (floor(x / self.cellSize), floor(y / self.cellSize))
+
+    def _cellRange(self, box: tuple[float, float, float, float]):
+        cx0, cy0 = self._cell(box[0], box[1])
+        cx1, cy1 = self._cell(box[2], box[3])
+        return cx0, cy0, cx1, cy1
+
+    def add(self, shape: Shape) -> int:
+        """Insere a forma e retorna seu índice."""
+        idx = len(self.shapes)
+        self.shapes.append(shape)
+        self._bounds.append(shape.getBounds())
+        self._attach(idx)
+        self._count += 1
+        return idx
+
+    def _isBig(self, box: tuple[float, float, float, float]) -> bool:
+        cx0, cy0, cx1, cy1 = self._cellRange(box)
+        return (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > ShapeGrid.MAX_CELLS
+
+    def _attach(self, idx: int) -> None:
+        box = self._bounds[idx]
+        if self._isBig(box):
+            self._big.append(idx)
+            return
+        cx0, cy0, cx1, cy1 = self._cellRange(box)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells.setdefault((cx, cy), []).append(idx)
+
+    def _detach(self, idx: int) -> None:
+        box = self._bounds[idx]
+        if self._isBig(box):
+            self._big.remove(idx)
+            return
+        cx0, cy0, cx1, cy1 = self._cellRange(box)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self._cells[(cx, cy)]
+                bucket.remove(idx)
+                if not bucket:
+                    del self._cells[(cx, cy)]
+
+    def _live(self, idx: int) -> Shape:
+        shape = self.shapes[idx] if 0 <= idx < len(self.shapes) else None
+        if shape is None:
+            raise ValueError("shape inexistente")
+        return shape
+
+    def update(self, idx: int) -> None:
+        """Reindexa a forma idx depois que ela foi alterada."""
+        shape = self._live(idx)
+        self._detach(idx)
+        self._bounds[idx] = shape.getBounds()
+        self._attach(idx)
+
+    def remove(self, idx: int) -> None:
+        self._live(idx)
+        self._detach(idx)
+        self.shapes[idx] = None
+        self._count -= 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def containing(self, point: Point2D) -> list[int]:
+        """Índices (em ordem crescente) das formas que contêm o ponto."""
+        cands = self._cells.get(self._cell(point.x, point.y), [])
+        shapes = self.shapes
+        found = [i for i in cands if shapes[i].inside(point)]  # type: ignore[union-attr]
+        found += [i for i in self._big if shapes[i].inside(point)]  # type: ignore[union-attr]
+        return sorted(found)
+
+    def intersecting(self, box: tuple[float, float, float, float]) -> list[int]:
+        """Índices das formas cuja caixa envolvente intersecta a caixa dada."""
+        min_x, min_y, max_x, max_y = box
+        cx0, cy0, cx1, cy1 = self._cellRange(box)
+        cands: set[int] = set(self._big)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # caixa de consulta enorme: mais barato percorrer as células ocupadas
+            for (cx, cy), idxs in self._cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    cands.update(idxs)
+        else:
+            for cx in range(cx0, cx1 + 1):
+                for cy in range(cy0, cy1 + 1):
+                    cands.update(self._cells.get((cx, cy), ()))
+        found: list[int] = []
+        for i in cands:
+            b = self._bounds[i]
+            if b[0] <= max_x and min_x <= b[2] and b[1] <= max_y and min_y <= b[3]:
+                found.append(i)
+        return sorted(found)
+
+
 # ===== Funções auxiliares =====
 def show_shapes(shapes: list[Shape]) -> None:
     if not shapes:
@@ -100,9 +538,7 @@ def show_shapes(shapes: list[Shape]) -> None:
         print(f"[{i}] {s} | área={s.getArea():.2f} | perímetro={s.getPerimeter():.2f}")
 
 
-# ===== Função principal com comandos =====
-if __name__ == "__main__":
-    shapes: list[Shape] = []
+def show_commands() -> None:
     print("Comandos: ")
     print("  circle x y r        -> adiciona círculo (centro x,y; raio r)")
     print("  rect x1 y1 x2 y2    -> adiciona retângulo (vértices p1 e p2)")
@@ -111,6 +547,83 @@ if __name__ == "__main__":
     print("  end                 -> encerra")
     print("-" * 60)
 
+
+# ===== Modo lote: mesma saída do REPL, sem input()/print por linha =====
+def _cmd_circle(shapes: list[Shape], args: list[str]) -> None:
+    x, y, r = map(float, args)
+    shapes.append(Circle(Point2D(x, y), r))
+
+
+def _cmd_rect(shapes: list[Shape], args: list[str]) -> None:
+    x1, y1, x2, y2 = map(float, args)
+    shapes.append(Rectangle(Point2D(x1, y1), Point2D(x2, y2)))
+
+
+def _cmd_inside(shapes: list[Shape], args: list[str]) -> None:
+    i = int(args[0])
+    x, y = map(float, args[1:])
+    if i < 0 or i >= len(shapes):
+        print("fail: shape inexistente")
+    else:
+        print("true" if shapes[i].inside(Point2D(x, y)) else "false")
+
+
+def _cmd_show(shapes: list[Shape], args: list[str]) -> None:
+    show_shapes(shapes)
+
+
+# comando -> (quantidade de partes esperada, tratador); None encerra
+COMMANDS: dict[str, tuple[int, Callable[[list[Shape], list[str]], None] | None]] = {
+    "circle": (4, _cmd_circle),
+    "rect": (5, _cmd_rect),
+    "inside": (4, _cmd_inside),
+    "show": (1, _cmd_show),
+    "end": (1, None),
+}
+
+
+def run_batch(inp: TextIO, out: TextIO, flushEvery: int = 4096) -> None:
+    """
+    Lê os comandos de um stream e despacha pela tabela COMMANDS.
+    A saída é acumulada num buffer em memória e escrita em blocos.
+    """
+    shapes: list[Shape] = []
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        show_commands()
+        pendentes = 0
+        for line in inp:
+            parts = line.split()
+            if not parts:
+                continue
+            entry = COMMANDS.get(parts[0].lower())
+            if entry is None or entry[0] != len(parts):
+                print("fail: comando inválido")
+            elif entry[1] is None:
+                break
+            else:
+                try:
+                    entry[1](shapes, parts[1:])
+                except Exception as e:
+                    print(f"fail: {e}")
+            pendentes += 1
+            if pendentes >= flushEvery:
+                out.write(buf.getvalue())
+                buf.seek(0)
+                buf.truncate()
+                pendentes = 0
+    out.write(buf.getvalue())
+    out.flush()
+
+
+# ===== Função principal com comandos =====
+if __name__ == "__main__" and "--batch" in sys.argv[1:]:
+    run_batch(sys.stdin, sys.stdout)
+
+elif __name__ == "__main__":
+    shapes: list[Shape] = []
+    show_commands()
+
     while True:
         try:
             line = input().strip()